@@ -5,8 +5,9 @@ Builds the complete invoice processing workflow graph with conditional routing
 and checkpoint support.
 """
 
-from typing import Dict, Any, Literal
+from typing import Dict, Any, List, Literal, Optional
 from langgraph.graph import StateGraph, END
+from langgraph.checkpoint.base import BaseCheckpointSaver
 try:
     from langgraph.checkpoint.sqlite import SqliteSaver
 except ImportError:
@@ -16,7 +17,7 @@ from pathlib import Path
 import json
 import logging
 
-from src.agents.state_schema import InvoiceWorkflowState, MatchResult, HumanDecision
+from src.agents.state_schema import InvoiceWorkflowState, MatchResult, HumanDecision, WorkflowStatus
 from src.agents.nodes.intake_node import intake_node
 from src.agents.nodes.understand_node import understand_node
 from src.agents.nodes.prepare_node import prepare_node
@@ -34,6 +35,25 @@ from src.config.settings import settings
 logger = logging.getLogger(__name__)
 
 
+def continue_unless_failed(next_stage: str):
+    """
+    Build a router for a sequential edge that short-circuits failed runs.
+    
+    Nodes catch their own exceptions and return status FAILED; without this,
+    later nodes would keep running on incomplete state and overwrite the status.
+    
+    - If status == FAILED → COMPLETE (finalizes with FAILED status)
+    - Else → next_stage
+    """
+    def route(state: InvoiceWorkflowState) -> str:
+        if state.get("status") == WorkflowStatus.FAILED:
+            logger.info(f"[ROUTING] Stage failed → COMPLETE (skipping {next_stage})")
+            return "COMPLETE"
+        return next_stage
+    
+    return route
+
+
 def route_after_match(state: InvoiceWorkflowState) -> Literal["CHECKPOINT_HITL", "RECONCILE"]:
     """
     Route after MATCH_TWO_WAY stage.
@@ -89,12 +109,16 @@ def route_after_hitl(state: InvoiceWorkflowState) -> Literal["RECONCILE", "COMPL
         return "COMPLETE"
 
 
-def build_invoice_graph(workflow_config: Dict[str, Any] = None) -> StateGraph:
+def build_invoice_graph(
+    workflow_config: Dict[str, Any] = None,
+    checkpointer: Optional[BaseCheckpointSaver] = None,
+    interrupt_before: Optional[List[str]] = None
+) -> StateGraph:
     """
     Construct LangGraph from workflow configuration.
     
     Key features:
-    - Sequential deterministic nodes
+    - Sequential deterministic nodes; a stage that fails routes to COMPLETE
     - Conditional edge from MATCH_TWO_WAY:
       - If match_result == 'FAILED' → CHECKPOINT_HITL
       - Else → RECONCILE
@@ -106,6 +130,10 @@ def build_invoice_graph(workflow_config: Dict[str, Any] = None) -> StateGraph:
     Args:
         workflow_config: Optional workflow configuration dict.
                         If None, loads from workflow.json or uses defaults.
+        checkpointer: Optional LangGraph checkpoint saver.
+                      If None, a new MemorySaver is used.
+        interrupt_before: Optional node names to pause before, e.g.
+                          ["CHECKPOINT_HITL"] to stop at the HITL boundary.
     
     Returns:
         Compiled LangGraph workflow
@@ -131,12 +159,12 @@ def build_invoice_graph(workflow_config: Dict[str, Any] = None) -> StateGraph:
     workflow.add_node("NOTIFY", notify_node)
     workflow.add_node("COMPLETE", complete_node)
     
-    # Add sequential edges
+    # Add sequential edges; a failed stage jumps straight to COMPLETE
     logger.info("Adding sequential edges...")
-    workflow.add_edge("INTAKE", "UNDERSTAND")
-    workflow.add_edge("UNDERSTAND", "PREPARE")
-    workflow.add_edge("PREPARE", "RETRIEVE")
-    workflow.add_edge("RETRIEVE", "MATCH_TWO_WAY")
+    _add_sequential_edge(workflow, "INTAKE", "UNDERSTAND")
+    _add_sequential_edge(workflow, "UNDERSTAND", "PREPARE")
+    _add_sequential_edge(workflow, "PREPARE", "RETRIEVE")
+    _add_sequential_edge(workflow, "RETRIEVE", "MATCH_TWO_WAY")
     
     # Conditional routing after matching
     workflow.add_conditional_edges(
@@ -171,9 +199,9 @@ def build_invoice_graph(workflow_config: Dict[str, Any] = None) -> StateGraph:
     )
     
     # Continue sequential flow after reconciliation
-    workflow.add_edge("RECONCILE", "APPROVE")
-    workflow.add_edge("APPROVE", "POSTING")
-    workflow.add_edge("POSTING", "NOTIFY")
+    _add_sequential_edge(workflow, "RECONCILE", "APPROVE")
+    _add_sequential_edge(workflow, "APPROVE", "POSTING")
+    _add_sequential_edge(workflow, "POSTING", "NOTIFY")
     workflow.add_edge("NOTIFY", "COMPLETE")
     workflow.add_edge("COMPLETE", END)
     
@@ -182,17 +210,33 @@ def build_invoice_graph(workflow_config: Dict[str, Any] = None) -> StateGraph:
     
     # Configure checkpoint saver - use MemorySaver for demo (works without SQLite setup)
     # In production, you would use SqliteSaver for persistence
-    from langgraph.checkpoint.memory import MemorySaver
-    memory = MemorySaver()
-    logger.info("Using MemorySaver for checkpoints (demo mode)")
+    if checkpointer is None:
+        from langgraph.checkpoint.memory import MemorySaver
+        checkpointer = MemorySaver()
+        logger.info("Using MemorySaver for checkpoints (demo mode)")
     
     logger.info("Compiling workflow graph...")
-    compiled_graph = workflow.compile(checkpointer=memory)
+    compiled_graph = workflow.compile(
+        checkpointer=checkpointer,
+        interrupt_before=interrupt_before
+    )
     
     logger.info("✓ Workflow graph compiled successfully")
     return compiled_graph
 
 
+def _add_sequential_edge(workflow: StateGraph, stage: str, next_stage: str):
+    """Connect stage to next_stage, routing to COMPLETE instead if stage failed"""
+    workflow.add_conditional_edges(
+        stage,
+        continue_unless_failed(next_stage),
+        {
+            next_stage: next_stage,
+            "COMPLETE": "COMPLETE"
+        }
+    )
+
+
 def _load_workflow_config() -> Dict[str, Any]:
     """
     Load workflow configuration from workflow.json.
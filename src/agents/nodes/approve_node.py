@@ -10,12 +10,63 @@ from datetime import datetime
 from typing import Dict, Any
 from langchain_core.runnables import RunnableConfig
 
-from src.agents.state_schema import InvoiceWorkflowState, ExecutionLog, ApprovalStatus
+from src.agents.state_schema import InvoiceWorkflowState, ExecutionLog, ApprovalStatus, FLAG_BITS, flags_to_mask
 from src.config.settings import settings
 from src.utils.logger import setup_logger, log_execution
 
 logger = setup_logger(__name__)
 
+FLAG_HIGH_RISK = FLAG_BITS["high_risk"]
+FLAG_NEW_VENDOR = FLAG_BITS["new_vendor"]
+
+
+class ApprovalPolicy:
+    """
+    Invoice approval policy evaluated on plain numbers and a flags bitmask.
+    
+    Thresholds are read from settings once at construction.
+    """
+    
+    def __init__(self):
+        # Default threshold is $20K, but can be configured
+        self.auto_approval_threshold = getattr(settings, "AUTO_APPROVAL_THRESHOLD", 20000.0)
+        self.high_risk_score = 0.7
+        self.new_vendor_limit = 5000.0
+    
+    def evaluate(
+        self,
+        invoice_amount: float,
+        risk_score: float,
+        flags_mask: int
+    ) -> tuple[ApprovalStatus, str]:
+        """
+        Apply approval policy based on invoice characteristics.
+        
+        Returns:
+            Tuple of (approval_status, policy_name)
+        """
+        # Policy 1: High risk score requires manual approval
+        if risk_score > self.high_risk_score:
+            return ApprovalStatus.PENDING_APPROVAL, "HIGH_RISK_POLICY"
+        
+        # Policy 2: High risk flags require manual approval
+        if flags_mask & FLAG_HIGH_RISK:
+            return ApprovalStatus.PENDING_APPROVAL, "HIGH_RISK_FLAG_POLICY"
+        
+        # Policy 3: New vendor requires manual approval for amounts > $5K
+        if flags_mask & FLAG_NEW_VENDOR and invoice_amount > self.new_vendor_limit:
+            return ApprovalStatus.PENDING_APPROVAL, "NEW_VENDOR_POLICY"
+        
+        # Policy 4: Amount threshold - auto-approve if under threshold
+        if invoice_amount <= self.auto_approval_threshold:
+            return ApprovalStatus.AUTO_APPROVED, "AMOUNT_THRESHOLD_POLICY"
+        
+        # Policy 5: Large amounts require manual approval
+        return ApprovalStatus.PENDING_APPROVAL, "LARGE_AMOUNT_POLICY"
+
+
+_approval_policy = ApprovalPolicy()
+
 
 async def approve_node(
     state: InvoiceWorkflowState,
@@ -37,10 +88,13 @@ async def approve_node(
     try:
         # Extract invoice data
         parsed_invoice = state.get("parsed_invoice", {})
-        vendor_profile = state.get("vendor_profile", {})
-        flags = state.get("flags", {})
         risk_score = state.get("risk_score", 1.0)
         
+        # PREPARE stores the flags pre-folded into a bitmask
+        flags_mask = state.get("flags_mask")
+        if flags_mask is None:
+            flags_mask = flags_to_mask(state.get("flags") or {})
+        
         if not parsed_invoice:
             raise ValueError("parsed_invoice is required for approval")
         
@@ -48,11 +102,10 @@ async def approve_node(
         invoice_id = parsed_invoice.get("invoice_id") or state.get("raw_id", "UNKNOWN")
         
         # Apply approval policies
-        approval_status, policy_applied = _apply_approval_policy(
+        approval_status, policy_applied = _approval_policy.evaluate(
             invoice_amount,
             risk_score,
-            flags,
-            vendor_profile
+            flags_mask
         )
         
         # Create execution log entry
@@ -98,42 +151,3 @@ async def approve_node(
             "status": "FAILED"
         }
 
-
-def _apply_approval_policy(
-    invoice_amount: float,
-    risk_score: float,
-    flags: Dict[str, Any],
-    vendor_profile: Dict[str, Any]
-) -> tuple[ApprovalStatus, str]:
-    """
-    Apply approval policy based on invoice characteristics.
-    
-    Returns:
-        Tuple of (approval_status, policy_name)
-    """
-    # Policy 1: High risk score requires manual approval
-    if risk_score > 0.7:
-        return ApprovalStatus.PENDING_APPROVAL, "HIGH_RISK_POLICY"
-    
-    # Policy 2: High risk flags require manual approval
-    if flags.get("high_risk", False):
-        return ApprovalStatus.PENDING_APPROVAL, "HIGH_RISK_FLAG_POLICY"
-    
-    # Policy 3: New vendor requires manual approval for amounts > $5K
-    if flags.get("new_vendor", False) and invoice_amount > 5000.0:
-        return ApprovalStatus.PENDING_APPROVAL, "NEW_VENDOR_POLICY"
-    
-    # Policy 4: Amount threshold - auto-approve if under threshold
-    # Default threshold is $20K, but can be configured
-    auto_approval_threshold = getattr(settings, "AUTO_APPROVAL_THRESHOLD", 20000.0)
-    
-    if invoice_amount <= auto_approval_threshold:
-        return ApprovalStatus.AUTO_APPROVED, "AMOUNT_THRESHOLD_POLICY"
-    
-    # Policy 5: Large amounts require manual approval
-    if invoice_amount > auto_approval_threshold:
-        return ApprovalStatus.PENDING_APPROVAL, "LARGE_AMOUNT_POLICY"
-    
-    # Default: auto-approve
-    return ApprovalStatus.AUTO_APPROVED, "DEFAULT_POLICY"
-
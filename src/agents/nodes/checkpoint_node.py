@@ -53,10 +53,6 @@ async def checkpoint_node(
         # Generate checkpoint ID
         checkpoint_id = checkpoint_store.generate_checkpoint_id()
         
-        # Persist full state to database
-        workflow_id = state.get("workflow_id")
-        await checkpoint_store.save_checkpoint(checkpoint_id, state, workflow_id)
-        
         # Prepare invoice data for review ticket
         parsed_invoice = state.get("parsed_invoice", {})
         invoice_data = {
@@ -67,16 +63,19 @@ async def checkpoint_node(
             "match_details": state.get("match_details", {})
         }
         
-        # Create review ticket
+        # Reason shown on the review ticket
         reason_for_hold = (
             f"2-way match failed. Match score: {state.get('match_score', 0):.2f} "
             f"(threshold: {state.get('match_details', {}).get('threshold', 0.90)})"
         )
         
-        review_url = await checkpoint_store.create_review_ticket(
+        # Persist full state and the review ticket together
+        review_url = await checkpoint_store.save_with_ticket(
             checkpoint_id,
+            state,
             invoice_data,
-            reason_for_hold
+            reason_for_hold,
+            workflow_id=state.get("workflow_id")
         )
         
         # Create execution log entry
@@ -47,9 +47,10 @@ async def hitl_node(
             logger.warning("[HITL_DECISION] No human decision found, cannot proceed")
             raise ValueError("human_decision is required for HITL_DECISION node. Workflow must be resumed with a decision.")
         
-        # Validate decision
+        # Validate decision (state restored from a checkpoint may hold the plain string value)
         if human_decision not in [HumanDecision.ACCEPT, HumanDecision.REJECT]:
             raise ValueError(f"Invalid human decision: {human_decision}")
+        human_decision = HumanDecision(human_decision)
         
         # Generate resume token
         resume_token = f"resume_{uuid.uuid4().hex[:12]}"
@@ -5,12 +5,13 @@ Mode: Non-deterministic (depends on enrichment tool)
 Tools: Bigtool (enrichment), MCP COMMON (normalize_vendor, compute_flags)
 """
 
+import asyncio
 import time
 from datetime import datetime
 from typing import Dict, Any
 from langchain_core.runnables import RunnableConfig
 
-from src.agents.state_schema import InvoiceWorkflowState, ExecutionLog
+from src.agents.state_schema import InvoiceWorkflowState, ExecutionLog, flags_to_mask
 from src.integrations.bigtool import BigtoolPicker
 from src.integrations.mcp_client import CommonClient, AtlasClient
 from src.utils.logger import setup_logger, log_execution
@@ -29,6 +30,11 @@ async def prepare_node(
     - Enriches vendor data via Bigtool and MCP ATLAS
     - Computes risk flags and metadata via MCP COMMON
     
+    Normalization and enrichment run concurrently, so ATLAS enrich_vendor
+    receives the raw vendor name (whitespace-stripped) rather than the
+    COMMON-normalized name. Enrichment results and their cache entries are
+    therefore keyed on the name as it appears on the invoice.
+    
     Returns:
         State updates with vendor_profile, flags, and execution log
     """
@@ -44,26 +50,26 @@ async def prepare_node(
         vendor_tax_id = parsed_invoice.get("vendor_tax_id")
         invoice_amount = parsed_invoice.get("amount", 0.0)
         
-        # Normalize vendor via MCP COMMON
+        # Select enrichment tool via Bigtool
+        bigtool = BigtoolPicker()
+        enrichment_tool = await bigtool.select("enrichment", context={})
+        
+        log_execution(logger, "PREPARE", tool_selected=enrichment_tool)
+        
+        # Normalize vendor via MCP COMMON and enrich via MCP ATLAS concurrently.
+        # Enrichment uses the raw vendor name so it doesn't wait on normalization;
+        # vendor_name may be None when UNDERSTAND found no vendor.
         common_client = CommonClient()
+        atlas_client = AtlasClient()
         try:
-            normalized = await common_client.normalize_vendor(vendor_name, vendor_tax_id)
+            normalized, enriched = await asyncio.gather(
+                common_client.normalize_vendor(vendor_name, vendor_tax_id),
+                atlas_client.enrich_vendor((vendor_name or "").strip())
+            )
             
             vendor_normalized_name = normalized.get("normalized_name", vendor_name)
             normalized_tax_id = normalized.get("normalized_tax_id", vendor_tax_id)
             
-            # Enrich vendor via Bigtool and MCP ATLAS
-            bigtool = BigtoolPicker()
-            enrichment_tool = await bigtool.select("enrichment", context={})
-            
-            log_execution(logger, "PREPARE", tool_selected=enrichment_tool)
-            
-            atlas_client = AtlasClient()
-            try:
-                enriched = await atlas_client.enrich_vendor(vendor_normalized_name)
-            finally:
-                await atlas_client.close()
-            
             # Build vendor profile
             vendor_profile = {
                 "original_name": vendor_name,
@@ -80,6 +86,7 @@ async def prepare_node(
                 parsed_invoice
             )
         finally:
+            await atlas_client.close()
             await common_client.close()
         
         flags = flags_result.get("flags", {})
@@ -105,6 +112,7 @@ async def prepare_node(
             "vendor_normalized_name": vendor_normalized_name,
             "vendor_tax_id": normalized_tax_id,
             "flags": flags,
+            "flags_mask": flags_to_mask(flags),
             "risk_score": risk_score,
             "current_stage": "PREPARE",
             "execution_history": execution_history,
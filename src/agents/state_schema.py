@@ -40,6 +40,23 @@ class ApprovalStatus(str, Enum):
     REJECTED = "REJECTED"
 
 
+# Bit assigned to each risk flag in state["flags_mask"]
+FLAG_BITS = {
+    "high_risk": 1,
+    "new_vendor": 2,
+    "amount_threshold_exceeded": 4
+}
+
+
+def flags_to_mask(flags: Dict[str, Any]) -> int:
+    """Fold a risk flags dict into an integer bitmask"""
+    mask = 0
+    for name, bit in FLAG_BITS.items():
+        if flags.get(name):
+            mask |= bit
+    return mask
+
+
 class ExecutionLog(TypedDict, total=False):
     """Single execution log entry"""
     stage: str
@@ -73,6 +90,7 @@ class InvoiceWorkflowState(TypedDict, total=False):
     # ========== PREPARE Stage ==========
     vendor_profile: Optional[Dict[str, Any]]  # Normalized and enriched vendor data
     flags: Optional[Dict[str, Any]]  # Risk flags and computed metadata
+    flags_mask: Optional[int]  # Risk flags folded into a bitmask for APPROVE
     vendor_normalized_name: Optional[str]
     vendor_tax_id: Optional[str]
     risk_score: Optional[float]
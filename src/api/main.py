@@ -12,6 +12,7 @@ import logging
 from src.api.routes import workflow, human_review
 from src.agents.graph_builder import build_invoice_graph
 from src.config.settings import settings
+from src.integrations.mcp_client import close_shared_client
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +44,7 @@ async def lifespan(app: FastAPI):
     
     # Cleanup
     logger.info("Shutting down Invoice Processing Agent API...")
+    await close_shared_client()
     workflow_graph = None
 
 
@@ -17,6 +17,8 @@ class Settings(BaseSettings):
     # MCP Servers
     COMMON_SERVER_URL: str = "http://localhost:8001"
     ATLAS_SERVER_URL: str = "http://localhost:8002"
+    MCP_CONNECT_TIMEOUT: float = 2.0
+    MCP_READ_TIMEOUT: float = 30.0
     
     # Workflow Configuration
     MATCH_THRESHOLD: float = 0.90
@@ -11,7 +11,8 @@ Intelligently selects the best tool from a pool based on:
 import os
 import yaml
 import asyncio
-import uuid
+import secrets
+from array import array
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 import logging
@@ -22,12 +23,17 @@ logger = logging.getLogger(__name__)
 class ToolConfig:
     """Configuration for a single tool"""
     
+    # Read credentials straight from the process environment mapping
+    _env = os.environ
+    
     def __init__(self, name: str, config: Dict[str, Any]):
         self.name = name
         self.enabled = config.get("enabled", False)
         self.cost_per_call = config.get("cost_per_call", 0.0)
         self.priority = config.get("priority", 999)
         self.capabilities = config.get("capabilities", [])
+        self.cap_set = frozenset(self.capabilities)
+        self._api_key_env_name = config.get("api_key_env")
         self.config = config
     
     def is_available(self) -> bool:
@@ -36,9 +42,8 @@ class ToolConfig:
             return False
         
         # Check for required API keys
-        if "api_key_env" in self.config:
-            api_key = os.getenv(self.config["api_key_env"])
-            if not api_key:
+        if self._api_key_env_name is not None:
+            if not self._env.get(self._api_key_env_name):
                 return False
         
         return True
@@ -62,7 +67,13 @@ class BigtoolPicker:
         
         self.tools_config_path = Path(tools_config_path)
         self.tool_pools: Dict[str, Dict[str, ToolConfig]] = {}
-        self.performance_history: Dict[str, Dict[str, float]] = {}  # tool_name -> {success_rate, avg_latency}
+        self._singleton: Dict[str, str] = {}  # capability -> name of its only enabled tool
+        
+        # Performance history stored column-wise: tool_name -> row index into parallel arrays
+        self._tool_idx: Dict[str, int] = {}
+        self._totals = array("q")
+        self._success = array("q")
+        self._rate = array("d")
         
         self._load_config()
     
@@ -84,6 +95,16 @@ class BigtoolPicker:
         except Exception as e:
             logger.error(f"Error loading tools config: {e}")
             self._load_default_config()
+        
+        self._index_singletons()
+    
+    def _index_singletons(self):
+        """Record capability pools that have exactly one enabled tool"""
+        self._singleton = {}
+        for capability, pool in self.tool_pools.items():
+            enabled = [tool.name for tool in pool.values() if tool.enabled]
+            if len(enabled) == 1:
+                self._singleton[capability] = enabled[0]
     
     def _load_default_config(self):
         """Load default tool configuration"""
@@ -141,6 +162,15 @@ class BigtoolPicker:
         if capability not in self.tool_pools:
             raise ValueError(f"Unknown capability: {capability}")
         
+        # Nothing to rank when the pool has a single enabled tool
+        singleton = self._singleton.get(capability)
+        if singleton is not None and not pool_hint:
+            if self.tool_pools[capability][singleton].is_available():
+                logger.info(
+                    f"Selected tool '{singleton}' for capability '{capability}' (only tool in pool)"
+                )
+                return singleton
+        
         available_tools = [
             tool for tool in self.tool_pools[capability].values()
             if tool.is_available()
@@ -162,10 +192,13 @@ class BigtoolPicker:
                     if tool.is_available()
                 ]
         
+        # Required capabilities are the same for every candidate, so build the set once
+        req_set = frozenset(context.get("required_capabilities", ()))
+        
         # Score tools based on multiple factors
         scored_tools = []
         for tool in available_tools:
-            score = self._score_tool(tool, context)
+            score = self._score_tool(tool, context, req_set)
             scored_tools.append((score, tool))
         
         # Sort by score (higher is better), then by priority (lower is better)
@@ -179,10 +212,20 @@ class BigtoolPicker:
         
         return selected_tool.name
     
-    def _score_tool(self, tool: ToolConfig, context: Dict[str, Any]) -> float:
+    def _score_tool(
+        self,
+        tool: ToolConfig,
+        context: Dict[str, Any],
+        req_set: frozenset = frozenset()
+    ) -> float:
         """
         Score a tool based on context requirements.
         
+        Args:
+            tool: Tool to score
+            context: Contextual requirements
+            req_set: Precomputed set of required capabilities
+        
         Returns:
             Score from 0.0 to 100.0 (higher is better)
         """
@@ -199,24 +242,21 @@ class BigtoolPicker:
             score += 5
         
         # Capability matching
-        required_caps = context.get("required_capabilities", [])
-        if required_caps:
-            matching_caps = set(required_caps) & set(tool.capabilities)
-            score += len(matching_caps) * 5
+        if req_set:
+            score += len(req_set & tool.cap_set) * 5
         
         # Context-specific scoring
-        if context.get("high_quality_required") and "high_accuracy" in tool.capabilities:
+        if context.get("high_quality_required") and "high_accuracy" in tool.cap_set:
             score += 15
         if context.get("cost_sensitive") and tool.cost_per_call == 0:
             score += 10
-        if context.get("fast_execution") and "local_execution" in tool.capabilities:
+        if context.get("fast_execution") and "local_execution" in tool.cap_set:
             score += 10
         
         # Performance history
-        if tool.name in self.performance_history:
-            history = self.performance_history[tool.name]
-            success_rate = history.get("success_rate", 0.5)
-            score += success_rate * 20
+        idx = self._tool_idx.get(tool.name)
+        if idx is not None:
+            score += self._rate[idx] * 20
         
         return min(score, 100.0)
     
@@ -357,7 +397,7 @@ class BigtoolPicker:
         
         return {
             "sent": True,
-            "message_id": f"msg-{tool_name}-{uuid.uuid4().hex[:8]}",
+            "message_id": f"msg-{tool_name}-{secrets.token_hex(4)}",
             "delivered": True,
             "recipients": recipients,
             "tool": tool_name
@@ -376,18 +416,32 @@ class BigtoolPicker:
         else:
             return {"result": "success", "tool": tool_name}
     
+    @property
+    def performance_history(self) -> Dict[str, Dict[str, float]]:
+        """Snapshot of performance history per tool"""
+        return {
+            name: {
+                "success_rate": self._rate[idx],
+                "total_calls": self._totals[idx],
+                "successful_calls": self._success[idx]
+            }
+            for name, idx in self._tool_idx.items()
+        }
+    
+    def _get_tool_idx(self, tool_name: str) -> int:
+        """Return the history row for a tool, allocating one on first use"""
+        idx = self._tool_idx.get(tool_name)
+        if idx is None:
+            idx = len(self._totals)
+            self._tool_idx[tool_name] = idx
+            self._totals.append(0)
+            self._success.append(0)
+            self._rate.append(0.5)
+        return idx
+    
     def _update_performance(self, tool_name: str, success: bool):
         """Update performance history for a tool"""
-        if tool_name not in self.performance_history:
-            self.performance_history[tool_name] = {
-                "success_rate": 1.0 if success else 0.0,
-                "total_calls": 1,
-                "successful_calls": 1 if success else 0
-            }
-        else:
-            history = self.performance_history[tool_name]
-            history["total_calls"] += 1
-            if success:
-                history["successful_calls"] += 1
-            history["success_rate"] = history["successful_calls"] / history["total_calls"]
-
+        idx = self._get_tool_idx(tool_name)
+        self._totals[idx] += 1
+        self._success[idx] += success
+        self._rate[idx] = self._success[idx] / self._totals[idx]
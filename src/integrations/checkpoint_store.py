@@ -5,22 +5,69 @@ Manages checkpoint storage and retrieval for workflow state persistence.
 Supports SQLite and PostgreSQL backends.
 """
 
+import asyncio
 import json
-import uuid
+import secrets
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 import logging
 
-from sqlalchemy import create_engine, Column, String, JSON, DateTime, Boolean, Float, Text
+from sqlalchemy import create_engine, event, bindparam, text, Column, String, JSON, DateTime, Boolean, Float, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import QueuePool, StaticPool
 
 logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+# Write-behind batching for save_checkpoint
+_FLUSH_INTERVAL = 0.05  # seconds to wait for more writes before flushing a batch
+_FLUSH_BATCH_SIZE = 256
+
+# Applied to every new SQLite connection: WAL lets readers run alongside the
+# writer, and NORMAL sync skips the per-commit fsync that WAL makes unnecessary
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",  # 64 MiB page cache
+    "PRAGMA mmap_size=268435456",  # 256 MiB memory-mapped I/O
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Configure journaling and caching on a new SQLite connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def _settle(done: asyncio.Future, error: Optional[BaseException]):
+    """Resolve a queued save's completion future on the loop that owns it"""
+    def resolve():
+        if done.done():
+            return
+        if error is None:
+            done.set_result(None)
+        else:
+            done.set_exception(error)
+    
+    loop = done.get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    
+    if loop is running:
+        resolve()
+    elif not loop.is_closed():
+        loop.call_soon_threadsafe(resolve)
+
 
 class CheckpointModel(Base):
     """Database model for checkpoints"""
@@ -34,6 +81,22 @@ class CheckpointModel(Base):
     workflow_id = Column(String, index=True)
 
 
+# Checkpoint upsert shared by SQLite and PostgreSQL, built once so the batch
+# flusher skips ORM statement construction and compilation on every save
+_UPSERT_CHECKPOINT = text(
+    "INSERT INTO checkpoints (checkpoint_id, state_blob, created_at, updated_at, status, workflow_id) "
+    "VALUES (:cid, :blob, :now, :now, 'active', :wid) "
+    "ON CONFLICT (checkpoint_id) DO UPDATE SET "
+    "state_blob = excluded.state_blob, "
+    "updated_at = excluded.updated_at, "
+    "status = 'active', "
+    "workflow_id = excluded.workflow_id"
+).bindparams(
+    bindparam("blob", type_=JSON),
+    bindparam("now", type_=DateTime)
+)
+
+
 class HumanReviewQueueModel(Base):
     """Database model for human review queue"""
     __tablename__ = "human_review_queue"
@@ -69,21 +132,36 @@ class CheckpointStore:
             db_path = Path("./invoice_processing.db")
             db_url = f"sqlite:///{db_path.absolute()}"
         
-        # For SQLite, use StaticPool to allow multiple connections
         if db_url.startswith("sqlite"):
+            # In-memory databases exist per connection, so they must share one.
+            # File databases in WAL mode can serve concurrent readers from a pool.
+            in_memory = db_url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in db_url
+            pool_kwargs = {"poolclass": StaticPool} if in_memory else {"poolclass": QueuePool, "pool_size": 5}
             self.engine = create_engine(
                 db_url,
                 connect_args={"check_same_thread": False},
-                poolclass=StaticPool
+                **pool_kwargs
             )
+            event.listen(self.engine, "connect", _set_sqlite_pragmas)
         else:
             self.engine = create_engine(db_url)
         
+        if self.engine.dialect.name not in ("sqlite", "postgresql"):
+            raise ValueError(
+                f"Unsupported checkpoint database '{self.engine.dialect.name}': "
+                "only SQLite and PostgreSQL are supported"
+            )
+        
         # Create tables
         Base.metadata.create_all(self.engine)
         
         self.SessionLocal = sessionmaker(bind=self.engine)
         
+        # Pending checkpoint writes, drained by a background flusher task.
+        # Both are created lazily because __init__ may run outside an event loop.
+        self._pending: Optional[asyncio.Queue] = None
+        self._flusher_task: Optional[asyncio.Task] = None
+        
         logger.info(f"Initialized CheckpointStore with database: {db_url}")
     
     def _get_session(self) -> Session:
@@ -94,42 +172,155 @@ class CheckpointStore:
         self,
         checkpoint_id: str,
         state: Dict[str, Any],
-        workflow_id: Optional[str] = None
+        workflow_id: Optional[str] = None,
+        wait: bool = True
     ) -> str:
         """
         Persist workflow state to database.
         
+        The write is queued and committed by a background flusher that batches
+        all saves arriving within a short window into one transaction. By default
+        the call returns once its batch is committed, so the checkpoint is durable
+        and visible to every other CheckpointStore on the same database.
+        
         Args:
             checkpoint_id: Unique checkpoint identifier
             state: Workflow state dictionary
             workflow_id: Optional workflow ID
+            wait: If False, return as soon as the write is queued (write-behind).
+                  Only this store's own reads and writes flush it first; the write
+                  is lost if the event loop stops before aclose() is awaited, and
+                  a failure is only logged.
         
         Returns:
             Checkpoint ID
+        
+        Raises:
+            Exception: If wait is True and the batch holding this write failed
         """
-        session = self._get_session()
+        # Snapshot the state now so later mutations by the caller are not persisted
+        serializable_state = self._make_serializable(state)
+        
+        queue = self._ensure_flusher()
+        done = asyncio.get_running_loop().create_future() if wait else None
+        await queue.put((checkpoint_id, serializable_state, workflow_id or state.get("workflow_id"), done))
+        
+        logger.debug(f"Queued checkpoint {checkpoint_id}")
+        
+        if done is not None:
+            await done
+        return checkpoint_id
+    
+    async def flush(self):
+        """
+        Wait until all queued checkpoint writes are committed.
+        
+        Writes queued by a flusher on another event loop are committed inline.
+        Failed batches are logged with their checkpoint ids rather than raised
+        here; waiting saves see their own batch's outcome.
+        """
+        if self._pending is None or self._flusher_task is None:
+            return
+        
+        if self._flusher_task.get_loop() is asyncio.get_running_loop():
+            await self._pending.join()
+        else:
+            self._drain_inline()
+    
+    async def aclose(self):
+        """Flush pending writes and stop the background flusher"""
         try:
-            # Convert datetime objects to strings for JSON serialization
-            serializable_state = self._make_serializable(state)
+            await self.flush()
+        finally:
+            if self._flusher_task is not None:
+                self._flusher_task.cancel()
+                self._flusher_task = None
+                self._pending = None
+    
+    def _ensure_flusher(self) -> asyncio.Queue:
+        """Start the flusher task on the running loop if it is not already running"""
+        loop = asyncio.get_running_loop()
+        task = self._flusher_task
+        
+        if task is None or task.done() or task.get_loop() is not loop:
+            # Writes left behind by a flusher on a previous loop are committed inline
+            if self._pending is not None:
+                self._drain_inline()
             
-            checkpoint = CheckpointModel(
-                checkpoint_id=checkpoint_id,
-                state_blob=serializable_state,
-                workflow_id=workflow_id or state.get("workflow_id"),
-                status="active"
-            )
+            self._pending = asyncio.Queue()
+            self._flusher_task = loop.create_task(self._flush_loop(self._pending))
+        
+        return self._pending
+    
+    async def _flush_loop(self, queue: asyncio.Queue):
+        """Drain the pending queue, committing each batch in a single transaction"""
+        while True:
+            batch = [await queue.get()]
             
-            session.merge(checkpoint)
-            session.commit()
+            while len(batch) < _FLUSH_BATCH_SIZE:
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=_FLUSH_INTERVAL))
+                except asyncio.TimeoutError:
+                    break
             
-            logger.info(f"Saved checkpoint {checkpoint_id}")
-            return checkpoint_id
+            try:
+                self._commit_batch(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+    
+    def _drain_inline(self):
+        """Commit writes still queued for a flusher that runs on another loop"""
+        leftover = []
+        while not self._pending.empty():
+            leftover.append(self._pending.get_nowait())
+            self._pending.task_done()
+        
+        if leftover:
+            self._commit_batch(leftover)
+    
+    def _commit_batch(self, batch: List[Tuple[str, Any, Optional[str], Optional[asyncio.Future]]]):
+        """
+        Write a batch of queued saves and report the outcome to each waiting saver.
+        
+        A failure is logged by _write_checkpoints and delivered only to the
+        saves in this batch, never to unrelated callers.
+        """
+        error = None
+        try:
+            self._write_checkpoints([entry[:3] for entry in batch])
         except Exception as e:
-            session.rollback()
-            logger.error(f"Error saving checkpoint {checkpoint_id}: {e}")
+            error = e
+        
+        for *_, done in batch:
+            if done is not None:
+                _settle(done, error)
+    
+    def _write_checkpoints(self, batch: List[Tuple[str, Any, Optional[str]]]):
+        """
+        Upsert a batch of checkpoints in one transaction.
+        
+        Only the most recent state per checkpoint_id in the batch is written.
+        """
+        now = datetime.utcnow()
+        latest = {
+            checkpoint_id: {"cid": checkpoint_id, "blob": state_blob, "now": now, "wid": workflow_id}
+            for checkpoint_id, state_blob, workflow_id in batch
+        }
+        rows = list(latest.values())
+        
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(_UPSERT_CHECKPOINT, rows)
+            
+            logger.info(f"Saved {len(rows)} checkpoint(s): {', '.join(latest)}")
+        except Exception as e:
+            logger.error(f"Error saving checkpoints {', '.join(latest)}: {e}")
             raise
-        finally:
-            session.close()
+    
+    def _upsert_checkpoints(self, session: Session, rows: List[Dict[str, Any]]):
+        """Upsert checkpoint rows within the caller's session (not committed)"""
+        session.execute(_UPSERT_CHECKPOINT, rows)
     
     async def load_checkpoint(self, checkpoint_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -141,6 +332,8 @@ class CheckpointStore:
         Returns:
             Workflow state dictionary, or None if not found
         """
+        await self.flush()
+        
         session = self._get_session()
         try:
             checkpoint = session.query(CheckpointModel).filter_by(
@@ -179,37 +372,102 @@ class CheckpointStore:
         Returns:
             Review URL
         """
+        await self.flush()
+        
         session = self._get_session()
         try:
-            if review_url is None:
-                review_url = f"http://localhost:8000/human-review/{checkpoint_id}"
+            review_ticket = self._build_review_ticket(
+                checkpoint_id, invoice_data, reason_for_hold, review_url
+            )
             
-            invoice_id = invoice_data.get("invoice_id", invoice_data.get("raw_id", "UNKNOWN"))
-            vendor_name = invoice_data.get("vendor_name", invoice_data.get("vendor_normalized_name", "Unknown"))
-            amount = invoice_data.get("amount", 0.0)
+            session.merge(review_ticket)
+            session.commit()
             
-            review_ticket = HumanReviewQueueModel(
-                checkpoint_id=checkpoint_id,
-                invoice_id=invoice_id,
-                vendor_name=vendor_name,
-                amount=amount,
-                reason_for_hold=reason_for_hold,
-                review_url=review_url,
-                status="pending"
+            logger.info(f"Created review ticket for checkpoint {checkpoint_id}: {review_ticket.review_url}")
+            return review_ticket.review_url
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error creating review ticket for {checkpoint_id}: {e}")
+            raise
+        finally:
+            session.close()
+    
+    async def save_with_ticket(
+        self,
+        checkpoint_id: str,
+        state: Dict[str, Any],
+        invoice_data: Dict[str, Any],
+        reason_for_hold: str,
+        workflow_id: Optional[str] = None,
+        review_url: Optional[str] = None
+    ) -> str:
+        """
+        Persist a checkpoint and open its review ticket in a single transaction.
+        
+        Equivalent to save_checkpoint followed by create_review_ticket, but the
+        checkpoint is written immediately (not queued) together with the ticket.
+        
+        Args:
+            checkpoint_id: Unique checkpoint identifier
+            state: Workflow state dictionary
+            invoice_data: Invoice data dictionary
+            reason_for_hold: Reason why invoice needs review
+            workflow_id: Optional workflow ID
+            review_url: Optional review URL (will be generated if not provided)
+        
+        Returns:
+            Review URL
+        """
+        row = {
+            "cid": checkpoint_id,
+            "blob": self._make_serializable(state),
+            "now": datetime.utcnow(),
+            "wid": workflow_id or state.get("workflow_id")
+        }
+        
+        # Queued saves for the same checkpoint must not land after this write
+        await self.flush()
+        
+        session = self._get_session()
+        try:
+            review_ticket = self._build_review_ticket(
+                checkpoint_id, invoice_data, reason_for_hold, review_url
             )
             
+            self._upsert_checkpoints(session, [row])
             session.merge(review_ticket)
             session.commit()
             
-            logger.info(f"Created review ticket for checkpoint {checkpoint_id}: {review_url}")
-            return review_url
+            logger.info(f"Saved checkpoint {checkpoint_id} with review ticket: {review_ticket.review_url}")
+            return review_ticket.review_url
         except Exception as e:
             session.rollback()
-            logger.error(f"Error creating review ticket for {checkpoint_id}: {e}")
+            logger.error(f"Error saving checkpoint {checkpoint_id} with review ticket: {e}")
             raise
         finally:
             session.close()
     
+    def _build_review_ticket(
+        self,
+        checkpoint_id: str,
+        invoice_data: Dict[str, Any],
+        reason_for_hold: str,
+        review_url: Optional[str] = None
+    ) -> HumanReviewQueueModel:
+        """Build a pending review ticket row from invoice data"""
+        if review_url is None:
+            review_url = f"http://localhost:8000/human-review/{checkpoint_id}"
+        
+        return HumanReviewQueueModel(
+            checkpoint_id=checkpoint_id,
+            invoice_id=invoice_data.get("invoice_id", invoice_data.get("raw_id", "UNKNOWN")),
+            vendor_name=invoice_data.get("vendor_name", invoice_data.get("vendor_normalized_name", "Unknown")),
+            amount=invoice_data.get("amount", 0.0),
+            reason_for_hold=reason_for_hold,
+            review_url=review_url,
+            status="pending"
+        )
+    
     async def update_review_decision(
         self,
         checkpoint_id: str,
@@ -229,6 +487,8 @@ class CheckpointStore:
         Returns:
             True if updated successfully
         """
+        await self.flush()
+        
         session = self._get_session()
         try:
             review_ticket = session.query(HumanReviewQueueModel).filter_by(
@@ -262,6 +522,8 @@ class CheckpointStore:
         Returns:
             List of review ticket dictionaries
         """
+        await self.flush()
+        
         session = self._get_session()
         try:
             tickets = session.query(HumanReviewQueueModel).filter_by(
@@ -307,5 +569,5 @@ class CheckpointStore:
     
     def generate_checkpoint_id(self) -> str:
         """Generate a unique checkpoint ID"""
-        return f"ckpt_{uuid.uuid4().hex[:12]}"
+        return f"ckpt_{secrets.token_urlsafe(6)}"
 
@@ -0,0 +1,59 @@
+"""
+MCP Response Cache
+
+In-memory TTL + LRU cache for results of idempotent MCP abilities.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Least-recently-used cache whose entries expire after a time-to-live.
+    
+    Not thread-safe; intended for use from a single event loop.
+    """
+    
+    def __init__(self, maxsize: int = 2048, ttl: float = 300.0):
+        """
+        Initialize cache.
+        
+        Args:
+            maxsize: Maximum number of entries before the least recently used is evicted
+            ttl: Default time-to-live in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._d: OrderedDict = OrderedDict()  # key -> (expires_at, value)
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired"""
+        entry = self._d.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._d[key]
+            return None
+        
+        self._d.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store value under key, evicting the least recently used entry if full"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._d[key] = (expires_at, value)
+        self._d.move_to_end(key)
+        
+        while len(self._d) > self.maxsize:
+            self._d.popitem(last=False)
+    
+    def clear(self):
+        """Remove all entries"""
+        self._d.clear()
+    
+    def __len__(self) -> int:
+        return len(self._d)
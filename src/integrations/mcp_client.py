@@ -7,14 +7,186 @@ ATLAS handles external API calls and ERP operations.
 """
 
 import os
+import copy
+import json
+import asyncio
 import httpx
 import logging
-import uuid
 from typing import Dict, Any, Optional
 from enum import Enum
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# HTTP/2 lets concurrent ability calls share one connection per server. It needs
+# httpx[http2] and is negotiated via TLS ALPN, so plain-http servers or servers
+# without h2 support keep using HTTP/1.1.
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+from src.config.settings import settings
+from src.integrations.mcp_cache import TTLCache
+from src.integrations.reliability import CircuitBreakerError, aretry, get_breaker
+
 logger = logging.getLogger(__name__)
 
+# Connection pool shared by every MCP client so COMMON and ATLAS calls reuse sockets
+_MCP_LIMITS = httpx.Limits(
+    max_connections=1000,
+    max_keepalive_connections=100,
+    keepalive_expiry=15.0
+)
+# Fail fast when an MCP server is down so callers fall back to the mock quickly;
+# connect and read timeouts can be tuned with MCP_CONNECT_TIMEOUT / MCP_READ_TIMEOUT
+_MCP_TIMEOUT = httpx.Timeout(
+    connect=settings.MCP_CONNECT_TIMEOUT,
+    read=settings.MCP_READ_TIMEOUT,
+    write=10.0,
+    pool=5.0
+)
+
+_JSON_HEADERS = {"Content-Type": "application/json", "Accept": "application/json"}
+
+_shared_client: Optional[httpx.AsyncClient] = None
+_shared_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_shared_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide MCP HTTP client, creating it on first use.
+    
+    Pooled connections belong to the event loop that opened them, so a new
+    client is created if the running loop has changed (e.g. between test loops).
+    """
+    global _shared_client, _shared_client_loop
+    
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    
+    if _shared_client is None or _shared_client.is_closed or (
+        loop is not None and _shared_client_loop is not loop
+    ):
+        if _shared_client is not None:
+            _close_stale_client(_shared_client, _shared_client_loop)
+        
+        _shared_client = httpx.AsyncClient(
+            limits=_MCP_LIMITS,
+            timeout=_MCP_TIMEOUT,
+            http2=_HTTP2_AVAILABLE
+        )
+        _shared_client_loop = loop
+    
+    return _shared_client
+
+
+def _close_stale_client(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]):
+    """
+    Close a shared client that belongs to a previous event loop.
+    
+    Pooled connections can only be closed on the loop that opened them, so
+    the close is scheduled there while that loop is still open. Once the loop
+    is closed the client cannot be closed cleanly; it is dropped and its
+    sockets are released when it is garbage collected.
+    """
+    if client.is_closed:
+        return
+    
+    if loop is not None and not loop.is_closed():
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+    else:
+        logger.debug("Dropping MCP HTTP client from a closed event loop")
+
+
+# Per-ability cap on in-flight MCP requests; excess calls queue instead of
+# piling onto the server. Override with MCP_BULKHEAD_<ABILITY>, e.g. MCP_BULKHEAD_FETCH_PO=64
+_DEFAULT_BULKHEAD_LIMIT = 32
+_BULKHEADS: Dict[str, asyncio.Semaphore] = {}
+_bulkheads_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_bulkhead(ability_name: str) -> asyncio.Semaphore:
+    """Return the concurrency limiter for an ability on the running event loop"""
+    global _bulkheads_loop
+    
+    loop = asyncio.get_running_loop()
+    if _bulkheads_loop is not loop:
+        # Semaphores bind to the loop they first wait on
+        _BULKHEADS.clear()
+        _bulkheads_loop = loop
+    
+    sem = _BULKHEADS.get(ability_name)
+    if sem is None:
+        limit = int(os.getenv(f"MCP_BULKHEAD_{ability_name.upper()}", _DEFAULT_BULKHEAD_LIMIT))
+        sem = _BULKHEADS[ability_name] = asyncio.Semaphore(limit)
+    return sem
+
+
+# Abilities whose results depend only on their parameters; successful server
+# responses are cached for MCP_CACHE_TTL_<ABILITY> seconds (default 5 minutes)
+_CACHEABLE = frozenset({"normalize_vendor", "enrich_vendor", "compute_flags"})
+_response_cache = TTLCache(maxsize=2048, ttl=300.0)
+
+
+def _cache_ttl(ability_name: str) -> Optional[float]:
+    """Per-ability TTL override from the environment, if set"""
+    ttl = os.getenv(f"MCP_CACHE_TTL_{ability_name.upper()}")
+    return float(ttl) if ttl is not None else None
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize a request body to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _loads(data: bytes) -> Any:
+    """Parse a JSON response body"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Only timeouts, network errors, 5xx and 429 responses are worth retrying"""
+    if isinstance(exc, httpx.ConnectError):
+        # Nothing is listening; fall back now and let the circuit breaker track it
+        return False
+    if isinstance(exc, (httpx.TimeoutException, httpx.NetworkError)):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return False
+
+
+def _is_breaker_failure(exc: BaseException) -> bool:
+    """Client errors (4xx other than 429) mean the server is up; don't trip the breaker"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return True
+
+
+async def close_shared_client():
+    """Close the shared MCP HTTP client (call once on application shutdown)"""
+    global _shared_client, _shared_client_loop
+    
+    if _shared_client is not None:
+        if _shared_client_loop in (None, asyncio.get_running_loop()):
+            await _shared_client.aclose()
+        else:
+            _close_stale_client(_shared_client, _shared_client_loop)
+        _shared_client = None
+        _shared_client_loop = None
+
 
 class MCPServerType(str, Enum):
     """MCP Server types"""
@@ -29,6 +201,9 @@ class MCPClient:
     Handles HTTP communication, error handling, and retries.
     """
     
+    # Abilities exposed by the server; their URLs are built once per client
+    ABILITIES: tuple = ()
+    
     def __init__(self, server_type: MCPServerType, base_url: Optional[str] = None):
         """
         Initialize MCP client.
@@ -44,10 +219,18 @@ class MCPClient:
             base_url = os.getenv(env_var, f"http://localhost:800{1 if server_type == MCPServerType.COMMON else 2}")
         
         self.base_url = base_url.rstrip("/")
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self._headers = dict(_JSON_HEADERS)
+        self._url_cache: Dict[str, str] = {
+            name: f"{self.base_url}/ability/{name}" for name in self.ABILITIES
+        }
         
         logger.info(f"Initialized {server_type.value} MCP client at {self.base_url}")
     
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTP client for the current event loop"""
+        return _get_shared_client()
+    
     async def call_ability(self, ability_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         Execute an ability on the MCP server.
@@ -62,24 +245,55 @@ class MCPClient:
         Raises:
             RuntimeError: If ability call fails
         """
-        url = f"{self.base_url}/ability/{ability_name}"
+        url = self._url_cache.get(ability_name)
+        if url is None:
+            url = self._url_cache[ability_name] = f"{self.base_url}/ability/{ability_name}"
+        breaker = get_breaker(f"{self.server_type.value}:{ability_name}")
         
-        try:
-            response = await self.client.post(url, json=params)
+        async def do_post() -> Dict[str, Any]:
+            response = await self.client.post(url, content=body, headers=self._headers)
             response.raise_for_status()
-            result = response.json()
+            return _loads(response.content)
+        
+        try:
+            cache_key = None
+            if ability_name in _CACHEABLE:
+                cache_key = (
+                    self.base_url,
+                    ability_name,
+                    json.dumps(params, sort_keys=True, default=str)
+                )
+                cached = _response_cache.get(cache_key)
+                if cached is not None:
+                    return copy.deepcopy(cached)
+            
+            # Serialized once and reused across retries
+            body = _dumps(params)
+            
+            async with _get_bulkhead(ability_name):
+                result = await breaker.call(
+                    aretry, do_post, retry_on=_is_retryable, is_failure=_is_breaker_failure
+                )
             
-            logger.debug(
-                f"Successfully called {ability_name} on {self.server_type.value}: {result}"
-            )
+            if cache_key is not None:
+                _response_cache.set(cache_key, copy.deepcopy(result), _cache_ttl(ability_name))
+            
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Successfully called %s on %s: %s", ability_name, self.server_type.value, result
+                )
             
             return result
+        except CircuitBreakerError:
+            # Server is known to be down; skip the round trip entirely
+            logger.debug("Circuit open for %s on %s, using mock", ability_name, self.server_type.value)
+            return self._mock_ability(ability_name, params)
         except httpx.HTTPError as e:
-            logger.error(f"HTTP error calling {ability_name} on {self.server_type.value}: {e}")
+            logger.error("HTTP error calling %s on %s: %s", ability_name, self.server_type.value, e)
             # Fallback to mock implementation if server unavailable
             return self._mock_ability(ability_name, params)
         except Exception as e:
-            logger.error(f"Error calling {ability_name} on {self.server_type.value}: {e}")
+            logger.error("Error calling %s on %s: %s", ability_name, self.server_type.value, e)
             raise RuntimeError(f"Failed to call ability {ability_name}: {e}") from e
     
     def _mock_ability(self, ability_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
@@ -89,81 +303,32 @@ class MCPClient:
         This allows the system to work in demo mode without actual MCP servers.
         """
         logger.warning(
-            f"Using mock implementation for {ability_name} on {self.server_type.value}"
+            "Using mock implementation for %s on %s", ability_name, self.server_type.value
         )
         
-        # Return mock responses based on ability name
-        if "normalize" in ability_name.lower():
-            vendor_name = params.get("vendor_name", "")
-            return {
-                "normalized_name": vendor_name.upper().strip(),
-                "normalized_tax_id": params.get("tax_id", "").upper().strip(),
-                "confidence": 0.95
-            }
-        elif "compute_flags" in ability_name.lower() or "flags" in ability_name.lower():
-            return {
-                "risk_score": 0.15,
-                "flags": {
-                    "high_risk": False,
-                    "new_vendor": False,
-                    "amount_threshold_exceeded": False
-                }
-            }
-        elif "enrich" in ability_name.lower():
-            return {
-                "enriched": True,
-                "vendor_data": {
-                    "name": params.get("vendor_name", ""),
-                    "domain": f"{params.get('vendor_name', '').lower().replace(' ', '')}.com",
-                    "industry": "Technology"
-                }
-            }
-        elif ability_name == "post_to_erp" or ability_name.lower() == "post_to_erp":
-            # Mock post_to_erp response - must return success=True and erp_txn_id
-            # Check this BEFORE "po" check to avoid false matches
-            invoice_id = params.get("invoice_id") or "UNKNOWN"
-            return {
-                "success": True,
-                "erp_txn_id": f"TXN-{invoice_id}-{uuid.uuid4().hex[:8]}",
-                "posted_at": "2025-01-01T10:00:00Z"
-            }
-        elif "fetch_po" in ability_name.lower():
-            # Only match fetch_po specifically
-            return {
-                "pos": [
-                    {
-                        "po_id": "PO-001",
-                        "vendor": params.get("vendor_name", ""),
-                        "amount": params.get("amount", 0),
-                        "status": "open",
-                        "line_items": []
-                    }
-                ]
-            }
-        elif "post" in ability_name.lower() and "erp" in ability_name.lower():
-            # Fallback for other post+erp combinations
-            invoice_id = params.get("invoice_id") or "UNKNOWN"
-            return {
-                "success": True,
-                "erp_txn_id": f"TXN-{invoice_id}-{uuid.uuid4().hex[:8]}",
-                "posted_at": "2025-01-01T10:00:00Z"
-            }
-        elif "send" in ability_name.lower() or "notify" in ability_name.lower():
-            return {
-                "sent": True,
-                "message_id": f"MSG-{params.get('to', 'unknown')}",
-                "delivered": True
-            }
-        else:
-            return {
-                "success": True,
-                "result": f"Mock response for {ability_name}",
-                "params": params
-            }
+        # Known abilities dispatch directly; anything else is matched by substring
+        handler = _MOCK_EXACT.get(ability_name)
+        if handler is not None:
+            return handler(params)
+        
+        key = ability_name.lower()
+        handler = _MOCK_EXACT.get(key)
+        if handler is not None:
+            return handler(params)
+        
+        for substrings, handler in _MOCK_SUBSTR:
+            if all(sub in key for sub in substrings):
+                return handler(params)
+        
+        return _mock_default(ability_name, params)
     
     async def close(self):
-        """Close HTTP client connection"""
-        await self.client.aclose()
+        """
+        Release this client.
+        
+        The underlying HTTP connection pool is shared and stays open;
+        use close_shared_client() on application shutdown.
+        """
     
     async def __aenter__(self):
         """Async context manager entry"""
@@ -184,6 +349,8 @@ class CommonClient(MCPClient):
     - parse_invoice: Basic invoice parsing
     """
     
+    ABILITIES = ("normalize_vendor", "compute_flags", "parse_invoice")
+    
     def __init__(self, base_url: Optional[str] = None):
         super().__init__(MCPServerType.COMMON, base_url)
     
@@ -257,6 +424,8 @@ class AtlasClient(MCPClient):
     - send_notification: Send email notifications
     """
     
+    ABILITIES = ("enrich_vendor", "fetch_po", "fetch_grn", "post_to_erp", "send_notification")
+    
     def __init__(self, base_url: Optional[str] = None):
         super().__init__(MCPServerType.ATLAS, base_url)
     
@@ -372,3 +541,102 @@ class AtlasClient(MCPClient):
             "notification_type": notification_type
         })
 
+
+# ========== Mock ability responses (used when an MCP server is unavailable) ==========
+
+def _mock_normalize(params: Dict[str, Any]) -> Dict[str, Any]:
+    vendor_name = params.get("vendor_name", "")
+    return {
+        "normalized_name": vendor_name.upper().strip(),
+        "normalized_tax_id": params.get("tax_id", "").upper().strip(),
+        "confidence": 0.95
+    }
+
+
+# Static parts of mock responses, built once. Handlers hand out copies since
+# callers may store and mutate the results in workflow state.
+_FLAGS_TEMPLATE = {
+    "risk_score": 0.15,
+    "flags": {
+        "high_risk": False,
+        "new_vendor": False,
+        "amount_threshold_exceeded": False
+    }
+}
+_POSTED_AT = "2025-01-01T10:00:00Z"
+
+
+def _mock_flags(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {**_FLAGS_TEMPLATE, "flags": dict(_FLAGS_TEMPLATE["flags"])}
+
+
+def _mock_enrich(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "enriched": True,
+        "vendor_data": {
+            "name": params.get("vendor_name", ""),
+            "domain": f"{params.get('vendor_name', '').lower().replace(' ', '')}.com",
+            "industry": "Technology"
+        }
+    }
+
+
+def _mock_post_erp(params: Dict[str, Any]) -> Dict[str, Any]:
+    # Must return success=True and erp_txn_id
+    invoice_id = params.get("invoice_id") or "UNKNOWN"
+    return {
+        "success": True,
+        "erp_txn_id": f"TXN-{invoice_id}-{os.urandom(4).hex()}",
+        "posted_at": _POSTED_AT
+    }
+
+
+def _mock_fetch_po(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "pos": [
+            {
+                "po_id": "PO-001",
+                "vendor": params.get("vendor_name", ""),
+                "amount": params.get("amount", 0),
+                "status": "open",
+                "line_items": []
+            }
+        ]
+    }
+
+
+def _mock_notify(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "sent": True,
+        "message_id": f"MSG-{params.get('to', 'unknown')}",
+        "delivered": True
+    }
+
+
+def _mock_default(ability_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "success": True,
+        "result": f"Mock response for {ability_name}",
+        "params": params
+    }
+
+
+_MOCK_EXACT = {
+    "normalize_vendor": _mock_normalize,
+    "compute_flags": _mock_flags,
+    "enrich_vendor": _mock_enrich,
+    "post_to_erp": _mock_post_erp,
+    "fetch_po": _mock_fetch_po,
+    "send_notification": _mock_notify,
+}
+
+# Checked in order against the lowercased ability name; every substring must match
+_MOCK_SUBSTR = (
+    (("normalize",), _mock_normalize),
+    (("flags",), _mock_flags),
+    (("enrich",), _mock_enrich),
+    (("fetch_po",), _mock_fetch_po),
+    (("post", "erp"), _mock_post_erp),
+    (("send",), _mock_notify),
+    (("notify",), _mock_notify),
+)
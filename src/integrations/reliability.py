@@ -0,0 +1,170 @@
+"""
+Reliability Helpers
+
+Circuit breaker and retry-with-backoff primitives for remote calls.
+"""
+
+import asyncio
+import random
+import time
+import logging
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    """Circuit breaker states"""
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+
+class CircuitBreakerError(Exception):
+    """Raised when a call is rejected because the circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker guarding calls to a single remote dependency.
+    
+    - CLOSED: calls pass through; consecutive failures are counted
+    - OPEN: calls are rejected immediately until reset_timeout elapses
+    - HALF_OPEN: one trial call is let through; success closes the circuit,
+      failure opens it again
+    """
+    
+    def __init__(self, name: str, fail_max: int = 5, reset_timeout: float = 60.0):
+        """
+        Initialize circuit breaker.
+        
+        Args:
+            name: Name of the guarded dependency (used in logs)
+            fail_max: Consecutive failures before the circuit opens
+            reset_timeout: Seconds to stay open before allowing a trial call
+        """
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self.fail_count = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+    
+    def _before_call(self):
+        """Decide whether a call may proceed, transitioning OPEN -> HALF_OPEN when due"""
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                raise CircuitBreakerError(f"Circuit '{self.name}' is open")
+            self.state = CircuitState.HALF_OPEN
+            self._trial_in_flight = False
+        
+        if self.state == CircuitState.HALF_OPEN:
+            if self._trial_in_flight:
+                raise CircuitBreakerError(f"Circuit '{self.name}' is half-open, trial call in progress")
+            self._trial_in_flight = True
+    
+    def _on_success(self):
+        """Record a successful call"""
+        if self.state != CircuitState.CLOSED:
+            logger.info(f"Circuit '{self.name}' closed")
+        self.state = CircuitState.CLOSED
+        self.fail_count = 0
+        self._trial_in_flight = False
+    
+    def _on_failure(self):
+        """Record a failed call, opening the circuit if the threshold is reached"""
+        self.fail_count += 1
+        self._trial_in_flight = False
+        
+        if self.state == CircuitState.HALF_OPEN or self.fail_count >= self.fail_max:
+            if self.state != CircuitState.OPEN:
+                logger.warning(f"Circuit '{self.name}' opened after {self.fail_count} failure(s)")
+            self.state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+    
+    async def call(
+        self,
+        fn: Callable[..., Awaitable[Any]],
+        *args: Any,
+        is_failure: Optional[Callable[[BaseException], bool]] = None,
+        **kwargs: Any
+    ) -> Any:
+        """
+        Call an async function through the breaker.
+        
+        Args:
+            fn: Async function to call with *args and **kwargs
+            is_failure: Predicate deciding whether an exception counts against
+                        the dependency. Exceptions it rejects (e.g. a 4xx response,
+                        which proves the server is up) are recorded as successes.
+                        If None, every Exception counts as a failure.
+        
+        Raises:
+            CircuitBreakerError: If the circuit is open
+        """
+        self._before_call()
+        
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception as e:
+            if is_failure is None or is_failure(e):
+                self._on_failure()
+            else:
+                self._on_success()
+            raise
+        except BaseException:
+            # Cancelled before an outcome was known; release the half-open
+            # trial slot so the next call can probe the dependency again
+            self._trial_in_flight = False
+            raise
+        
+        self._on_success()
+        return result
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str, fail_max: int = 5, reset_timeout: float = 60.0) -> CircuitBreaker:
+    """Return the circuit breaker registered under name, creating it on first use"""
+    breaker = _BREAKERS.get(name)
+    if breaker is None:
+        breaker = _BREAKERS[name] = CircuitBreaker(name, fail_max, reset_timeout)
+    return breaker
+
+
+async def aretry(
+    fn: Callable[[], Awaitable[Any]],
+    retries: int = 3,
+    base: float = 0.2,
+    cap: float = 2.0,
+    retry_on: Optional[Callable[[BaseException], bool]] = None
+) -> Any:
+    """
+    Call an async function, retrying with exponential backoff and full jitter.
+    
+    Args:
+        fn: Zero-argument async function to call
+        retries: Maximum number of retries after the first attempt
+        base: Base delay in seconds
+        cap: Maximum delay in seconds
+        retry_on: Predicate deciding whether an exception is retryable.
+                  If None, every Exception is retried.
+    
+    Returns:
+        Result of fn
+    """
+    attempt = 0
+    while True:
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt >= retries or (retry_on is not None and not retry_on(e)):
+                raise
+            
+            delay = random.uniform(0, min(cap, base * 2 ** attempt))
+            attempt += 1
+            logger.debug(f"Retrying after {type(e).__name__} (attempt {attempt}/{retries}, sleeping {delay:.2f}s)")
+            await asyncio.sleep(delay)
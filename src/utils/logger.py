@@ -4,13 +4,22 @@ Structured Logging Setup
 Provides JSON-structured logging for all workflow nodes.
 """
 
+import atexit
 import logging
+import logging.handlers
 import json
+import queue
 import sys
-from datetime import datetime
+import threading
+from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 try:
     from src.config.settings import settings
     LOG_LEVEL = settings.LOG_LEVEL
@@ -21,32 +30,112 @@ except:
 class JSONFormatter(logging.Formatter):
     """JSON formatter for structured logging"""
     
+    # Optional attributes copied from the log record when present
+    EXTRA_FIELDS = ("stage", "tool_selected", "decision", "workflow_id", "checkpoint_id")
+    
     def format(self, record: logging.LogRecord) -> str:
         """Format log record as JSON"""
         log_data = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
         }
         
         # Add extra fields if present
-        if hasattr(record, "stage"):
-            log_data["stage"] = record.stage
-        if hasattr(record, "tool_selected"):
-            log_data["tool_selected"] = record.tool_selected
-        if hasattr(record, "decision"):
-            log_data["decision"] = record.decision
-        if hasattr(record, "workflow_id"):
-            log_data["workflow_id"] = record.workflow_id
-        if hasattr(record, "checkpoint_id"):
-            log_data["checkpoint_id"] = record.checkpoint_id
+        for key in self.EXTRA_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                log_data[key] = value
         
         # Add exception info if present
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
         
-        return json.dumps(log_data)
+        if orjson is not None:
+            return orjson.dumps(log_data, default=str).decode()
+        return json.dumps(log_data, default=str, ensure_ascii=False, separators=(",", ":"))
+
+
+class _ListenerJSONFormatter(JSONFormatter):
+    """JSON formatter shared by the listener's handlers; serializes each record once"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        line = record.__dict__.get("_json_line")
+        if line is None:
+            line = record._json_line = super().format(record)
+        return line
+
+
+class _PassThroughQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that enqueues records unformatted.
+    
+    The queue is in-process, so records need no pickling-safe preparation and
+    keep their extra attributes; formatting is left to the listener thread.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+# All structured loggers feed one queue; a single listener thread owns the
+# console and file handlers, so JSON serialization and disk I/O happen off
+# the caller's thread, once per record.
+_log_queue = queue.SimpleQueue()
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_lock = threading.Lock()
+
+# Names of loggers already configured by setup_logger
+_CONFIGURED: set[str] = set()
+_configured_lock = threading.Lock()
+
+
+def _get_queue_handler() -> logging.Handler:
+    """Start the shared queue listener on first use and return a handler feeding it"""
+    global _listener
+    
+    with _listener_lock:
+        if _listener is None:
+            # Records arrive unformatted; the listener's handlers serialize them
+            formatter = _ListenerJSONFormatter()
+            console_handler = logging.StreamHandler(sys.stdout)
+            console_handler.setFormatter(formatter)
+            
+            # Create file handler for persistent logging
+            log_dir = Path("./logs")
+            log_dir.mkdir(exist_ok=True)
+            
+            # Create log file with timestamp. Records are buffered and written in
+            # batches; errors flush the buffer immediately.
+            log_filename = log_dir / f"workflow_{datetime.utcnow().strftime('%Y%m%d')}.log"
+            rotating_handler = logging.handlers.RotatingFileHandler(
+                log_filename,
+                maxBytes=50_000_000,
+                backupCount=5,
+                encoding='utf-8'
+            )
+            rotating_handler.setFormatter(formatter)
+            file_handler = logging.handlers.MemoryHandler(
+                capacity=1024,
+                flushLevel=logging.ERROR,
+                target=rotating_handler
+            )
+            
+            _listener = logging.handlers.QueueListener(
+                _log_queue,
+                console_handler,
+                file_handler,
+                respect_handler_level=True
+            )
+            _listener.start()
+            
+            # atexit runs in reverse order: drain the queue, flush the buffer, close the file
+            atexit.register(rotating_handler.close)
+            atexit.register(file_handler.close)
+            atexit.register(_listener.stop)
+    
+    return _PassThroughQueueHandler(_log_queue)
 
 
 def setup_logger(name: str, level: Optional[str] = None) -> logging.Logger:
@@ -62,31 +151,24 @@ def setup_logger(name: str, level: Optional[str] = None) -> logging.Logger:
     """
     logger = logging.getLogger(name)
     
-    if level is None:
-        level = LOG_LEVEL
-    
-    logger.setLevel(getattr(logging, level.upper(), logging.INFO))
-    
-    # Remove existing handlers
-    logger.handlers.clear()
-    
-    # Create console handler with JSON formatter
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(JSONFormatter())
-    logger.addHandler(console_handler)
-    
-    # Create file handler for persistent logging
-    log_dir = Path("./logs")
-    log_dir.mkdir(exist_ok=True)
-    
-    # Create log file with timestamp
-    log_filename = log_dir / f"workflow_{datetime.utcnow().strftime('%Y%m%d')}.log"
-    file_handler = logging.FileHandler(log_filename, encoding='utf-8')
-    file_handler.setFormatter(JSONFormatter())
-    logger.addHandler(file_handler)
-    
-    # Prevent propagation to root logger
-    logger.propagate = False
+    with _configured_lock:
+        if name in _CONFIGURED:
+            if level is not None:
+                logger.setLevel(getattr(logging, level.upper(), logging.INFO))
+            return logger
+        
+        if level is None:
+            level = LOG_LEVEL
+        
+        logger.setLevel(getattr(logging, level.upper(), logging.INFO))
+        
+        # Attach the shared queue handler once per logger
+        logger.addHandler(_get_queue_handler())
+        
+        # Prevent propagation to root logger
+        logger.propagate = False
+        
+        _CONFIGURED.add(name)
     
     return logger
 
@@ -112,6 +194,10 @@ def log_execution(
         error: Error message (if applicable)
         **extra: Additional fields to log
     """
+    # Skip building the message and extra fields if the record would be dropped
+    if not logger.isEnabledFor(logging.ERROR if error else logging.INFO):
+        return
+    
     # Use extra dict for custom fields (not as keyword arguments)
     extra_fields = {
         "stage": stage,
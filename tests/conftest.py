@@ -0,0 +1,14 @@
+"""
+Shared pytest configuration.
+"""
+
+try:
+    import uvloop
+except ImportError:  # uvloop is unavailable on Windows
+    uvloop = None
+
+
+if uvloop is not None:
+    def pytest_asyncio_loop_factories(config, item):
+        """Run async tests on uvloop instead of the default asyncio loop"""
+        return {"uvloop": uvloop.new_event_loop}
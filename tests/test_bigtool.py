@@ -0,0 +1,67 @@
+"""
+Bigtool Tests
+
+Tests for tool performance history tracking.
+"""
+
+import pytest
+
+from src.integrations.bigtool import BigtoolPicker
+
+
+@pytest.fixture
+def picker():
+    """Bigtool picker loaded from the default tools config"""
+    return BigtoolPicker()
+
+
+def test_performance_history_empty(picker):
+    """Test no history is reported before any tool runs"""
+    assert picker.performance_history == {}
+
+
+def test_performance_history_mixed_outcomes(picker):
+    """Test success rates and the snapshot after mixed success and failure updates"""
+    for success in (True, True, False, True):
+        picker._update_performance("local_fs", success)
+    picker._update_performance("s3", False)
+    
+    history = picker.performance_history
+    
+    assert history["local_fs"] == {
+        "success_rate": 0.75,
+        "total_calls": 4,
+        "successful_calls": 3
+    }
+    assert history["s3"] == {
+        "success_rate": 0.0,
+        "total_calls": 1,
+        "successful_calls": 0
+    }
+    
+    # The snapshot is a copy; mutating it leaves the picker's history alone
+    history["local_fs"]["total_calls"] = 0
+    assert picker.performance_history["local_fs"]["total_calls"] == 4
+
+
+@pytest.mark.asyncio
+async def test_execute_records_performance(picker, monkeypatch):
+    """Test execute() records one outcome per call, including failures"""
+    outcomes = iter([True, False])
+    
+    async def fake_execute_tool(tool_name, capability, tool_config, **kwargs):
+        if not next(outcomes):
+            raise IOError("disk full")
+        return {"saved": True}
+    
+    monkeypatch.setattr(picker, "_execute_tool", fake_execute_tool)
+    
+    await picker.execute("local_fs", "storage")
+    with pytest.raises(RuntimeError):
+        await picker.execute("local_fs", "storage")
+    
+    assert picker.performance_history["local_fs"] == {
+        "success_rate": 0.5,
+        "total_calls": 2,
+        "successful_calls": 1
+    }
@@ -4,13 +4,10 @@ HITL (Human-in-the-Loop) Tests
 Tests for checkpoint creation, human review, and resume functionality.
 """
 
+import asyncio
+import copy
+import importlib
 import pytest
-from datetime import datetime
-from pathlib import Path
-import sys
-
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.integrations.checkpoint_store import CheckpointStore
 from src.agents.state_schema import HumanDecision, MatchResult
@@ -19,15 +16,40 @@ from src.agents.nodes.hitl_node import hitl_node
 from langchain_core.runnables import RunnableConfig
 
 
-@pytest.fixture
-def checkpoint_store():
-    """Checkpoint store instance for testing"""
-    return CheckpointStore()
+@pytest.fixture(scope="module")
+def checkpoint_store(tmp_path_factory):
+    """
+    Checkpoint store shared by all tests in this module.
+    
+    Backed by a database file under pytest's temp directory, which is
+    separate per pytest-xdist worker, so parallel runs never share a file.
+    """
+    db_path = tmp_path_factory.mktemp("checkpoints") / "checkpoints.db"
+    store = CheckpointStore(f"sqlite:///{db_path}")
+    yield store
+    store.engine.dispose()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def node_checkpoint_store(checkpoint_store):
+    """
+    Route the CheckpointStore() built by the HITL nodes to the module's store,
+    so node tests never touch ./invoice_processing.db.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        # The nodes hold their own reference to CheckpointStore
+        for module_name in (
+            "src.agents.nodes.checkpoint_node",
+            "src.agents.nodes.hitl_node",
+        ):
+            module = importlib.import_module(module_name)
+            mp.setattr(module, "CheckpointStore", lambda *args, **kwargs: checkpoint_store)
+        yield checkpoint_store
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def sample_checkpoint_state():
-    """Sample state for checkpoint testing"""
+    """Sample state for checkpoint testing (shared; copy before mutating)"""
     return {
         "workflow_id": "wf_test_001",
         "invoice_payload": {
@@ -65,6 +87,58 @@ async def test_checkpoint_creation(checkpoint_store, sample_checkpoint_state):
     assert loaded_state["workflow_id"] == sample_checkpoint_state["workflow_id"]
 
 
+@pytest.mark.asyncio
+async def test_failed_save_reported_to_its_caller(checkpoint_store, sample_checkpoint_state, monkeypatch):
+    """Test a failed write surfaces from its own save, not from later reads"""
+    failing_id = checkpoint_store.generate_checkpoint_id()
+    other_id = checkpoint_store.generate_checkpoint_id()
+    write_checkpoints = checkpoint_store._write_checkpoints
+    
+    def fail_for(batch):
+        if any(entry[0] == failing_id for entry in batch):
+            raise RuntimeError("disk full")
+        write_checkpoints(batch)
+    
+    monkeypatch.setattr(checkpoint_store, "_write_checkpoints", fail_for)
+    
+    with pytest.raises(RuntimeError, match="disk full"):
+        await checkpoint_store.save_checkpoint(failing_id, sample_checkpoint_state)
+    
+    await checkpoint_store.save_checkpoint(other_id, sample_checkpoint_state)
+    
+    assert await checkpoint_store.load_checkpoint(other_id) is not None
+    assert await checkpoint_store.load_checkpoint(failing_id) is None
+
+
+def test_saved_checkpoint_survives_loop_exit(checkpoint_store, sample_checkpoint_state):
+    """Test a save is committed before its event loop shuts down"""
+    checkpoint_id = checkpoint_store.generate_checkpoint_id()
+    
+    asyncio.run(checkpoint_store.save_checkpoint(checkpoint_id, sample_checkpoint_state))
+    
+    # A fresh store has no queued writes of its own to flush
+    other_store = CheckpointStore(str(checkpoint_store.engine.url))
+    try:
+        assert asyncio.run(other_store.load_checkpoint(checkpoint_id)) is not None
+    finally:
+        other_store.engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_saved_checkpoint_visible_to_other_store(checkpoint_store, sample_checkpoint_state):
+    """Test a save is immediately visible through another store on the same database"""
+    checkpoint_id = checkpoint_store.generate_checkpoint_id()
+    other_store = CheckpointStore(str(checkpoint_store.engine.url))
+    
+    try:
+        await checkpoint_store.save_checkpoint(checkpoint_id, sample_checkpoint_state)
+        loaded_state = await other_store.load_checkpoint(checkpoint_id)
+    finally:
+        other_store.engine.dispose()
+    
+    assert loaded_state["workflow_id"] == sample_checkpoint_state["workflow_id"]
+
+
 @pytest.mark.asyncio
 async def test_review_ticket_creation(checkpoint_store, sample_checkpoint_state):
     """Test review ticket creation"""
@@ -90,6 +164,27 @@ async def test_review_ticket_creation(checkpoint_store, sample_checkpoint_state)
     assert any(ticket["checkpoint_id"] == checkpoint_id for ticket in pending)
 
 
+@pytest.mark.asyncio
+async def test_save_with_ticket(checkpoint_store, sample_checkpoint_state):
+    """Test saving a checkpoint and its review ticket together"""
+    checkpoint_id = checkpoint_store.generate_checkpoint_id()
+    
+    review_url = await checkpoint_store.save_with_ticket(
+        checkpoint_id,
+        sample_checkpoint_state,
+        sample_checkpoint_state["parsed_invoice"],
+        "Match failed for testing"
+    )
+    
+    assert checkpoint_id in review_url
+    
+    loaded_state = await checkpoint_store.load_checkpoint(checkpoint_id)
+    assert loaded_state["workflow_id"] == sample_checkpoint_state["workflow_id"]
+    
+    pending = await checkpoint_store.list_pending_reviews()
+    assert any(ticket["checkpoint_id"] == checkpoint_id for ticket in pending)
+
+
 @pytest.mark.asyncio
 async def test_review_decision_update(checkpoint_store, sample_checkpoint_state):
     """Test updating review decision"""
@@ -126,8 +221,9 @@ async def test_review_decision_update(checkpoint_store, sample_checkpoint_state)
 async def test_checkpoint_node(sample_checkpoint_state):
     """Test CHECKPOINT_HITL node"""
     config = RunnableConfig()
+    state = copy.deepcopy(sample_checkpoint_state)
     
-    result = await checkpoint_node(sample_checkpoint_state, config)
+    result = await checkpoint_node(state, config)
     
     assert "checkpoint_id" in result
     assert "review_url" in result
@@ -139,13 +235,14 @@ async def test_checkpoint_node(sample_checkpoint_state):
 async def test_hitl_node_accept(sample_checkpoint_state):
     """Test HITL_DECISION node with ACCEPT"""
     config = RunnableConfig()
+    state = copy.deepcopy(sample_checkpoint_state)
     
     # Set human decision
-    sample_checkpoint_state["human_decision"] = HumanDecision.ACCEPT
-    sample_checkpoint_state["reviewer_id"] = "test_reviewer"
-    sample_checkpoint_state["checkpoint_id"] = "ckpt_test123"
+    state["human_decision"] = HumanDecision.ACCEPT
+    state["reviewer_id"] = "test_reviewer"
+    state["checkpoint_id"] = "ckpt_test123"
     
-    result = await hitl_node(sample_checkpoint_state, config)
+    result = await hitl_node(state, config)
     
     assert "resume_token" in result
     assert result["human_decision"] == HumanDecision.ACCEPT
@@ -156,13 +253,14 @@ async def test_hitl_node_accept(sample_checkpoint_state):
 async def test_hitl_node_reject(sample_checkpoint_state):
     """Test HITL_DECISION node with REJECT"""
     config = RunnableConfig()
+    state = copy.deepcopy(sample_checkpoint_state)
     
     # Set human decision
-    sample_checkpoint_state["human_decision"] = HumanDecision.REJECT
-    sample_checkpoint_state["reviewer_id"] = "test_reviewer"
-    sample_checkpoint_state["checkpoint_id"] = "ckpt_test123"
+    state["human_decision"] = HumanDecision.REJECT
+    state["reviewer_id"] = "test_reviewer"
+    state["checkpoint_id"] = "ckpt_test123"
     
-    result = await hitl_node(sample_checkpoint_state, config)
+    result = await hitl_node(state, config)
     
     assert "resume_token" in result
     assert result["human_decision"] == HumanDecision.REJECT
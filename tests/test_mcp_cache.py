@@ -0,0 +1,125 @@
+"""
+MCP Response Cache Tests
+
+Tests for the TTL/LRU cache and its use by MCPClient.call_ability.
+"""
+
+import httpx
+import pytest
+from types import SimpleNamespace
+
+from src.integrations import mcp_cache, mcp_client, reliability
+from src.integrations.mcp_cache import TTLCache
+from src.integrations.mcp_client import CommonClient
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock for the cache module"""
+    now = [1000.0]
+    monkeypatch.setattr(mcp_cache, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_cache_hit_and_miss(clock):
+    """Test stored values are returned until replaced"""
+    cache = TTLCache(maxsize=4, ttl=10.0)
+    
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    
+    cache.set("a", 2)
+    assert cache.get("a") == 2
+    assert len(cache) == 1
+
+
+def test_cache_expiry(clock):
+    """Test entries expire after the default or per-entry TTL"""
+    cache = TTLCache(maxsize=4, ttl=10.0)
+    cache.set("default", 1)
+    cache.set("short", 2, ttl=1.0)
+    
+    clock[0] += 5.0
+    assert cache.get("short") is None
+    assert cache.get("default") == 1
+    
+    clock[0] += 5.0
+    assert cache.get("default") is None
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used(clock):
+    """Test the least recently used entry is evicted when full"""
+    cache = TTLCache(maxsize=2, ttl=10.0)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+@pytest.fixture
+def mcp_server(monkeypatch):
+    """
+    Route MCP HTTP calls to an in-process handler with a fresh cache and breakers.
+    
+    The returned dict holds the request count and a "down" switch that makes
+    the server refuse connections.
+    """
+    server = {"calls": 0, "down": False}
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        if server["down"]:
+            raise httpx.ConnectError("connection refused", request=request)
+        server["calls"] += 1
+        return httpx.Response(200, json={"normalized_name": "ACME", "confidence": 0.99})
+    
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(mcp_client, "_get_shared_client", lambda: client)
+    monkeypatch.setattr(mcp_client, "_response_cache", TTLCache())
+    monkeypatch.setattr(reliability, "_BREAKERS", {})
+    return server
+
+
+@pytest.mark.asyncio
+async def test_call_ability_caches_server_response(mcp_server):
+    """Test a cacheable ability hits the server once for repeated params"""
+    client = CommonClient("http://mcp.test")
+    
+    first = await client.normalize_vendor("Acme", "TAX1")
+    first["normalized_name"] = "mutated"
+    second = await client.normalize_vendor("Acme", "TAX1")
+    
+    assert mcp_server["calls"] == 1
+    assert second["normalized_name"] == "ACME"
+
+
+@pytest.mark.asyncio
+async def test_call_ability_does_not_cache_mock_fallback(mcp_server):
+    """Test a mock response served while the server is down is not cached"""
+    client = CommonClient("http://mcp.test")
+    
+    mcp_server["down"] = True
+    fallback = await client.normalize_vendor("Acme", "TAX1")
+    assert fallback["confidence"] == 0.95  # mock response
+    
+    mcp_server["down"] = False
+    result = await client.normalize_vendor("Acme", "TAX1")
+    
+    assert mcp_server["calls"] == 1
+    assert result["normalized_name"] == "ACME"
+
+
+@pytest.mark.asyncio
+async def test_call_ability_unsortable_params(mcp_server):
+    """Test params that cannot form a cache key raise the documented RuntimeError"""
+    client = CommonClient("http://mcp.test")
+    
+    with pytest.raises(RuntimeError):
+        await client.call_ability("normalize_vendor", {"vendor_name": {1: "a", "b": 2}})
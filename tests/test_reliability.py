@@ -0,0 +1,182 @@
+"""
+Reliability Helper Tests
+
+Tests for the circuit breaker and retry-with-backoff primitives.
+"""
+
+import asyncio
+import httpx
+import pytest
+
+from src.integrations.reliability import (
+    CircuitBreaker,
+    CircuitBreakerError,
+    CircuitState,
+    aretry
+)
+from src.integrations.mcp_client import _is_breaker_failure
+
+
+async def _ok():
+    return "ok"
+
+
+async def _boom():
+    raise RuntimeError("boom")
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://mcp.test/ability/fetch_po")
+    response = httpx.Response(status, request=request)
+    return httpx.HTTPStatusError(f"HTTP {status}", request=request, response=response)
+
+
+async def _open(breaker: CircuitBreaker):
+    """Drive a breaker into the OPEN state"""
+    for _ in range(breaker.fail_max):
+        with pytest.raises(RuntimeError):
+            await breaker.call(_boom)
+    assert breaker.state == CircuitState.OPEN
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_after_fail_max():
+    """Test the circuit opens after consecutive failures and rejects calls"""
+    breaker = CircuitBreaker("test", fail_max=3, reset_timeout=60.0)
+    
+    await _open(breaker)
+    
+    with pytest.raises(CircuitBreakerError):
+        await breaker.call(_ok)
+
+
+@pytest.mark.asyncio
+async def test_breaker_success_resets_fail_count():
+    """Test a success between failures keeps the circuit closed"""
+    breaker = CircuitBreaker("test", fail_max=2, reset_timeout=60.0)
+    
+    with pytest.raises(RuntimeError):
+        await breaker.call(_boom)
+    assert await breaker.call(_ok) == "ok"
+    with pytest.raises(RuntimeError):
+        await breaker.call(_boom)
+    
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.fail_count == 1
+
+
+@pytest.mark.asyncio
+async def test_breaker_half_open_trial():
+    """Test a half-open trial closes the circuit on success and reopens it on failure"""
+    breaker = CircuitBreaker("test", fail_max=1, reset_timeout=0.0)
+    
+    await _open(breaker)
+    with pytest.raises(RuntimeError):
+        await breaker.call(_boom)
+    assert breaker.state == CircuitState.OPEN
+    
+    assert await breaker.call(_ok) == "ok"
+    assert breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_breaker_half_open_allows_single_trial():
+    """Test only one trial call is let through while half-open"""
+    breaker = CircuitBreaker("test", fail_max=1, reset_timeout=0.0)
+    await _open(breaker)
+    
+    release = asyncio.Event()
+    
+    async def slow():
+        await release.wait()
+        return "ok"
+    
+    trial = asyncio.ensure_future(breaker.call(slow))
+    await asyncio.sleep(0)
+    assert breaker.state == CircuitState.HALF_OPEN
+    
+    with pytest.raises(CircuitBreakerError):
+        await breaker.call(_ok)
+    
+    release.set()
+    assert await trial == "ok"
+    assert breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_breaker_cancelled_trial_releases_slot():
+    """Test cancelling the half-open trial lets the next call probe again"""
+    breaker = CircuitBreaker("test", fail_max=1, reset_timeout=0.0)
+    await _open(breaker)
+    
+    trial = asyncio.ensure_future(breaker.call(asyncio.sleep, 60))
+    await asyncio.sleep(0)
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+    
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert await breaker.call(_ok) == "ok"
+    assert breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_breaker_ignores_client_errors():
+    """Test 4xx responses don't count against the circuit but 5xx do"""
+    breaker = CircuitBreaker("test", fail_max=2, reset_timeout=60.0)
+    
+    async def raise_status(status):
+        raise _status_error(status)
+    
+    for _ in range(5):
+        with pytest.raises(httpx.HTTPStatusError):
+            await breaker.call(raise_status, 400, is_failure=_is_breaker_failure)
+    assert breaker.state == CircuitState.CLOSED
+    
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            await breaker.call(raise_status, 503, is_failure=_is_breaker_failure)
+    assert breaker.state == CircuitState.OPEN
+
+
+@pytest.mark.asyncio
+async def test_aretry_retries_until_success():
+    """Test aretry retries failed attempts and returns the first success"""
+    attempts = []
+    
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("transient")
+        return "ok"
+    
+    assert await aretry(flaky, retries=3, base=0.0) == "ok"
+    assert len(attempts) == 3
+
+
+@pytest.mark.asyncio
+async def test_aretry_gives_up_after_retries():
+    """Test aretry re-raises once retries are exhausted"""
+    attempts = []
+    
+    async def failing():
+        attempts.append(1)
+        raise RuntimeError("down")
+    
+    with pytest.raises(RuntimeError):
+        await aretry(failing, retries=2, base=0.0)
+    assert len(attempts) == 3
+
+
+@pytest.mark.asyncio
+async def test_aretry_skips_non_retryable():
+    """Test aretry re-raises immediately when retry_on rejects the exception"""
+    attempts = []
+    
+    async def failing():
+        attempts.append(1)
+        raise ValueError("bad request")
+    
+    with pytest.raises(ValueError):
+        await aretry(failing, retries=3, base=0.0, retry_on=lambda e: not isinstance(e, ValueError))
+    assert len(attempts) == 1
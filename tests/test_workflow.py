@@ -5,62 +5,163 @@ Tests for complete workflow execution including HITL scenarios.
 """
 
 import pytest
+import pytest_asyncio
 import asyncio
+import importlib
+import itertools
 from datetime import datetime
-from pathlib import Path
-import sys
+from types import MappingProxyType
 
-# Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+import orjson
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
 
-from src.agents.graph_builder import build_invoice_graph
 from src.agents.state_schema import InvoiceWorkflowState, MatchResult, HumanDecision, WorkflowStatus
-from src.integrations.checkpoint_store import CheckpointStore
 
+# Enum members used throughout the scenarios
+_ACCEPT = HumanDecision.ACCEPT
+_REJECT = HumanDecision.REJECT
+_MATCH_FAILED = MatchResult.FAILED
+_COMPLETED = WorkflowStatus.COMPLETED
+_HANDOFF = WorkflowStatus.MANUAL_HANDOFF
+_FAILED = WorkflowStatus.FAILED
 
-@pytest.fixture
+# Unique workflow/thread id suffixes; timestamps collide when scenarios run in the same second
+_wf_counter = itertools.count()
+
+# Fixed timestamp for state fields; no test depends on the actual time
+_FROZEN_NOW = datetime(2025, 1, 1, 0, 0, 0)
+
+# workflow_results runs every selected scenario at once, so all scenario tests
+# must land on one pytest-xdist worker (requires --dist loadgroup)
+pytestmark = pytest.mark.xdist_group("workflow_scenarios")
+
+
+# Read-only sample payload; scenarios put a dict() copy of it into workflow state
+_SAMPLE_INVOICE = MappingProxyType({
+    "invoice_id": "INV-TEST-001",
+    "vendor_name": "Test Vendor",
+    "vendor_tax_id": "TAX123",
+    "invoice_date": "2025-01-15",
+    "due_date": "2025-02-15",
+    "amount": 15000.00,
+    "currency": "USD",
+    "line_items": [
+        {
+            "line_item_id": "LI-001",
+            "desc": "Test Services",
+            "qty": 100,
+            "unit_price": 150.00,
+            "total": 15000.00
+        }
+    ],
+    "attachments": ["test_invoice.pdf"]
+})
+
+
+@pytest.fixture(scope="session")
 def sample_invoice():
-    """Sample invoice payload for testing"""
-    return {
-        "invoice_id": "INV-TEST-001",
-        "vendor_name": "Test Vendor",
-        "vendor_tax_id": "TAX123",
-        "invoice_date": "2025-01-15",
-        "due_date": "2025-02-15",
-        "amount": 15000.00,
-        "currency": "USD",
-        "line_items": [
-            {
-                "line_item_id": "LI-001",
-                "desc": "Test Services",
-                "qty": 100,
-                "unit_price": 150.00,
-                "total": 15000.00
-            }
-        ],
-        "attachments": ["test_invoice.pdf"]
-    }
+    """Sample invoice payload for testing (read-only)"""
+    return _SAMPLE_INVOICE
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module", autouse=True)
+async def in_memory_checkpoint_store():
+    """
+    Route every CheckpointStore() created by these tests and the HITL nodes
+    to one in-memory SQLite store, so no checkpoint touches the database file.
+    
+    In-memory databases are private to the process, so each pytest-xdist
+    worker gets its own store (and its own session-scoped graph).
+    """
+    from src.integrations.checkpoint_store import CheckpointStore
+    
+    store = CheckpointStore("sqlite://")
+    
+    with pytest.MonkeyPatch.context() as mp:
+        # Scenarios import CheckpointStore lazily from its module; the nodes hold their own reference
+        for module_name in (
+            "src.integrations.checkpoint_store",
+            "src.agents.nodes.checkpoint_node",
+            "src.agents.nodes.hitl_node",
+        ):
+            module = importlib.import_module(module_name)
+            mp.setattr(module, "CheckpointStore", lambda *args, **kwargs: store)
+        yield store
+    
+    await store.aclose()
+    store.engine.dispose()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def offline_mcp():
+    """
+    Answer every MCP ability call with the client's built-in mock response,
+    so nodes run their real logic without attempting to reach MCP servers.
+    """
+    from src.integrations.mcp_client import MCPClient
+    
+    async def call_mock_ability(self, ability_name, params):
+        return self._mock_ability(ability_name, params)
+    
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(MCPClient, "call_ability", call_mock_ability)
+        yield
+
 
+class _OrjsonSerde(JsonPlusSerializer):
+    """
+    LangGraph checkpoint serializer that encodes with orjson.
+    
+    orjson handles the plain dicts, enums and datetimes in workflow state;
+    anything it rejects falls back to the default JSON-plus serializer.
+    Enums and datetimes are restored as their string values, as with state
+    loaded from CheckpointStore.
+    """
+    
+    def dumps_typed(self, obj):
+        try:
+            return "orjson", orjson.dumps(obj)
+        except TypeError:
+            return super().dumps_typed(obj)
+    
+    def loads_typed(self, data):
+        type_, payload = data
+        if type_ == "orjson":
+            return orjson.loads(payload)
+        return super().loads_typed(data)
 
-@pytest.fixture
+
+@pytest.fixture(scope="session")
 def workflow_graph():
-    """Build and return workflow graph"""
-    return build_invoice_graph()
+    """Build the workflow graph once and share it across tests (each test uses its own thread_id)"""
+    from langgraph.checkpoint.memory import MemorySaver
+    from src.agents.graph_builder import build_invoice_graph
+    
+    return build_invoice_graph(checkpointer=MemorySaver(serde=_OrjsonSerde()))
 
 
-@pytest.mark.asyncio
-async def test_full_workflow_match_success(workflow_graph, sample_invoice):
-    """Test workflow when 2-way match succeeds"""
-    workflow_id = f"wf_test_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+@pytest.fixture(scope="session")
+def workflow_graph_hitl():
+    """Workflow graph that pauses before CHECKPOINT_HITL, for resume scenarios"""
+    from langgraph.checkpoint.memory import MemorySaver
+    from src.agents.graph_builder import build_invoice_graph
+    
+    return build_invoice_graph(
+        checkpointer=MemorySaver(serde=_OrjsonSerde()),
+        interrupt_before=["CHECKPOINT_HITL"]
+    )
+
+
+async def _run_match_success(workflow_graph, sample_invoice):
+    """Run the workflow end to end for an invoice expected to match"""
+    workflow_id = f"wf_test_{next(_wf_counter)}"
     thread_id = workflow_id
     
     initial_state: InvoiceWorkflowState = {
-        "invoice_payload": sample_invoice,
+        "invoice_payload": dict(sample_invoice),
         "workflow_id": workflow_id,
         "current_stage": "INTAKE",
-        "execution_history": [],
-        "errors": [],
-        "created_at": datetime.utcnow()
+        "created_at": _FROZEN_NOW
     }
     
     config = {
@@ -70,30 +171,19 @@ async def test_full_workflow_match_success(workflow_graph, sample_invoice):
     }
     
     # Execute workflow
-    result = await workflow_graph.ainvoke(initial_state, config)
-    
-    # Verify workflow completed
-    assert result.get("status") in [WorkflowStatus.COMPLETED, "COMPLETED"]
-    assert result.get("current_stage") == "COMPLETE"
-    assert result.get("final_payload") is not None
-    
-    # Verify no checkpoint was created (match passed)
-    assert result.get("checkpoint_id") is None
+    return await workflow_graph.ainvoke(initial_state, config)
 
 
-@pytest.mark.asyncio
-async def test_workflow_checkpoint_and_resume(workflow_graph, sample_invoice):
-    """Test HITL checkpoint creation and resume after human accepts"""
-    workflow_id = f"wf_test_hitl_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+async def _run_checkpoint_and_resume(workflow_graph, sample_invoice):
+    """Run the workflow until it pauses at the HITL boundary, then resume it with an ACCEPT decision"""
+    workflow_id = f"wf_test_hitl_{next(_wf_counter)}"
     thread_id = workflow_id
     
     initial_state: InvoiceWorkflowState = {
-        "invoice_payload": sample_invoice,
+        "invoice_payload": dict(sample_invoice),
         "workflow_id": workflow_id,
         "current_stage": "INTAKE",
-        "execution_history": [],
-        "errors": [],
-        "created_at": datetime.utcnow()
+        "created_at": _FROZEN_NOW
     }
     
     config = {
@@ -102,104 +192,59 @@ async def test_workflow_checkpoint_and_resume(workflow_graph, sample_invoice):
         }
     }
     
-    # Execute workflow until checkpoint
-    result = await workflow_graph.ainvoke(initial_state, config)
-    
-    # If match passed, we need to simulate a failure
-    # In a real scenario, the match_node would set match_result to FAILED
-    checkpoint_id = result.get("checkpoint_id")
-    
-    if not checkpoint_id:
-        # Simulate match failure by manually creating checkpoint
-        # This is a workaround for testing - in production, match_node would handle this
-        checkpoint_store = CheckpointStore()
-        checkpoint_id = checkpoint_store.generate_checkpoint_id()
-        
-        # Update state to simulate match failure
-        result["match_result"] = MatchResult.FAILED
-        result["match_score"] = 0.75  # Below threshold
-        result["checkpoint_id"] = checkpoint_id
-        
-        await checkpoint_store.save_checkpoint(checkpoint_id, result, workflow_id)
-        await checkpoint_store.create_review_ticket(
-            checkpoint_id,
-            sample_invoice,
-            "Match failed for testing"
-        )
-    
-    # Verify checkpoint was created
-    assert checkpoint_id is not None
-    
-    # Load checkpoint and simulate human acceptance
-    checkpoint_store = CheckpointStore()
-    checkpoint_state = await checkpoint_store.load_checkpoint(checkpoint_id)
-    assert checkpoint_state is not None
+    # Execute workflow until the interrupt before CHECKPOINT_HITL
+    await workflow_graph.ainvoke(initial_state, config)
     
-    # Update with human decision
-    updated_state = {
-        **checkpoint_state,
-        "human_decision": HumanDecision.ACCEPT,
+    # Verify workflow paused at the HITL boundary after a failed match
+    snapshot = await workflow_graph.aget_state(config)
+    assert snapshot.next == ("CHECKPOINT_HITL",)
+    assert snapshot.values.get("match_result") == _MATCH_FAILED
+    
+    # Record the human decision on the paused thread
+    await workflow_graph.aupdate_state(config, {
+        "human_decision": _ACCEPT,
         "reviewer_id": "test_reviewer",
         "review_notes": "Test acceptance",
-        "review_timestamp": datetime.utcnow(),
+        "review_timestamp": _FROZEN_NOW,
         "resume_token": "test_resume_token"
-    }
+    })
     
-    await checkpoint_store.update_review_decision(
-        checkpoint_id,
-        "ACCEPT",
-        "test_reviewer",
-        "Test acceptance"
-    )
-    
-    # Resume workflow
-    resume_config = {
-        "configurable": {
-            "thread_id": thread_id,
-            "checkpoint_id": checkpoint_id
-        }
-    }
-    
-    final_result = await workflow_graph.ainvoke(updated_state, resume_config)
-    
-    # Verify workflow completed after resume
-    assert final_result.get("status") in [WorkflowStatus.COMPLETED, "COMPLETED"]
-    assert final_result.get("human_decision") == HumanDecision.ACCEPT
+    # Resume workflow: CHECKPOINT_HITL creates the review ticket, HITL_DECISION records the decision
+    return await workflow_graph.ainvoke(None, config)
 
 
-@pytest.mark.asyncio
-async def test_workflow_human_reject(workflow_graph, sample_invoice):
-    """Test workflow when human rejects invoice"""
-    workflow_id = f"wf_test_reject_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+async def _run_human_reject(workflow_graph, sample_invoice):
+    """Resume a workflow from a saved checkpoint with a REJECT decision"""
+    workflow_id = f"wf_test_reject_{next(_wf_counter)}"
     thread_id = workflow_id
     
     # Create checkpoint manually for testing
+    from src.integrations.checkpoint_store import CheckpointStore
+    
     checkpoint_store = CheckpointStore()
     checkpoint_id = checkpoint_store.generate_checkpoint_id()
     
     initial_state: InvoiceWorkflowState = {
-        "invoice_payload": sample_invoice,
+        "invoice_payload": dict(sample_invoice),
         "workflow_id": workflow_id,
         "current_stage": "CHECKPOINT_HITL",
-        "match_result": MatchResult.FAILED,
+        "match_result": _MATCH_FAILED,
         "match_score": 0.75,
         "checkpoint_id": checkpoint_id,
-        "execution_history": [],
-        "errors": [],
-        "created_at": datetime.utcnow()
+        "created_at": _FROZEN_NOW
     }
     
     await checkpoint_store.save_checkpoint(checkpoint_id, initial_state, workflow_id)
     
-    # Update with human rejection
-    updated_state = {
-        **initial_state,
-        "human_decision": HumanDecision.REJECT,
+    # Update with human rejection (save_checkpoint already snapshotted initial_state)
+    updated_state = initial_state
+    updated_state.update({
+        "human_decision": _REJECT,
         "reviewer_id": "test_reviewer",
         "review_notes": "Test rejection",
-        "review_timestamp": datetime.utcnow(),
+        "review_timestamp": _FROZEN_NOW,
         "resume_token": "test_resume_token"
-    }
+    })
     
     # Execute from HITL_DECISION
     config = {
@@ -209,17 +254,12 @@ async def test_workflow_human_reject(workflow_graph, sample_invoice):
         }
     }
     
-    result = await workflow_graph.ainvoke(updated_state, config)
-    
-    # Verify workflow completed with MANUAL_HANDOFF status
-    assert result.get("status") in [WorkflowStatus.MANUAL_HANDOFF, "MANUAL_HANDOFF"]
-    assert result.get("human_decision") == HumanDecision.REJECT
+    return await workflow_graph.ainvoke(updated_state, config)
 
 
-@pytest.mark.asyncio
-async def test_workflow_error_handling(workflow_graph):
-    """Test workflow error handling with invalid input"""
-    workflow_id = f"wf_test_error_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+async def _run_error_handling(workflow_graph, sample_invoice):
+    """Run the workflow with an invalid invoice payload"""
+    workflow_id = f"wf_test_error_{next(_wf_counter)}"
     thread_id = workflow_id
     
     # Invalid invoice payload (missing required fields)
@@ -227,9 +267,7 @@ async def test_workflow_error_handling(workflow_graph):
         "invoice_payload": {},  # Missing required fields
         "workflow_id": workflow_id,
         "current_stage": "INTAKE",
-        "execution_history": [],
-        "errors": [],
-        "created_at": datetime.utcnow()
+        "created_at": _FROZEN_NOW
     }
     
     config = {
@@ -238,11 +276,121 @@ async def test_workflow_error_handling(workflow_graph):
         }
     }
     
-    # Execute workflow - should handle error gracefully
-    result = await workflow_graph.ainvoke(invalid_state, config)
+    # Execute workflow - INTAKE fails and the run should finish at COMPLETE as FAILED
+    return await workflow_graph.ainvoke(invalid_state, config)
+
+
+_SCENARIO_RUNNERS = {
+    "match_success": _run_match_success,
+    "checkpoint_and_resume": _run_checkpoint_and_resume,
+    "human_reject": _run_human_reject,
+    "error_handling": _run_error_handling,
+}
+
+# (scenario, expected_status, expected_decision)
+SCENARIOS = [
+    ("match_success", _COMPLETED, None),
+    ("checkpoint_and_resume", _COMPLETED, _ACCEPT),
+    ("human_reject", _HANDOFF, _REJECT),
+    # Unit-level counterpart: test_nodes.py::test_intake_node_missing_fields
+    pytest.param("error_handling", _FAILED, None, marks=pytest.mark.integration),
+]
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def workflow_results(request, workflow_graph, workflow_graph_hitl, sample_invoice):
+    """
+    Run the selected workflow scenarios concurrently and collect the outcomes.
+    
+    Only scenarios whose tests survived -k/-m selection are run; under
+    pytest-xdist the module's xdist_group keeps them on one worker. Scenarios use
+    distinct thread_ids, so they can share the compiled graph. Each outcome is
+    either the final state or the exception the scenario raised.
+    """
+    selected = [
+        item.callspec.params["scenario"]
+        for item in request.session.items
+        if item.module is request.module and item.originalname == "test_workflow_scenario"
+    ]
+    graphs = {"checkpoint_and_resume": workflow_graph_hitl}
+    outcomes = await asyncio.gather(
+        *(
+            _SCENARIO_RUNNERS[scenario](graphs.get(scenario, workflow_graph), sample_invoice)
+            for scenario in selected
+        ),
+        return_exceptions=True
+    )
+    return dict(zip(selected, outcomes))
+
+
+def _outcome(workflow_results, scenario):
+    """Return a scenario's final state, re-raising its exception if it failed"""
+    outcome = workflow_results[scenario]
+    if isinstance(outcome, BaseException):
+        raise outcome
+    return outcome
+
+
+@pytest.mark.parametrize(
+    "scenario,expected_status,expected_decision",
+    SCENARIOS,
+    ids=[getattr(scenario, "values", scenario)[0] for scenario in SCENARIOS]
+)
+@pytest.mark.asyncio(loop_scope="module")
+async def test_workflow_scenario(workflow_results, scenario, expected_status, expected_decision):
+    """Test the final status and human decision of each workflow scenario"""
+    result = _outcome(workflow_results, scenario)
+    
+    if scenario == "match_success":
+        # Verify workflow completed without a checkpoint (match passed)
+        assert result.get("current_stage") == "COMPLETE"
+        assert result.get("final_payload") is not None
+        assert result.get("checkpoint_id") is None
+    elif scenario == "error_handling":
+        # Verify the INTAKE error was recorded and the run was finalized
+        assert len(result.get("errors") or []) > 0
+        assert result["errors"][0]["stage"] == "INTAKE"
+        assert result.get("current_stage") == "COMPLETE"
     
-    # Verify error was recorded
-    assert result.get("errors") is not None
-    assert len(result.get("errors", [])) > 0
-    assert result.get("status") == "FAILED"
+    assert result.get("status") == expected_status
+    assert result.get("human_decision") == expected_decision
+
+
+# (failing stage, stage that must be skipped)
+FAILED_STAGES = [
+    ("PREPARE", "RETRIEVE"),
+    ("RETRIEVE", "MATCH_TWO_WAY"),
+]
 
+
+@pytest.mark.parametrize("failing_stage,skipped_stage", FAILED_STAGES, ids=[stage for stage, _ in FAILED_STAGES])
+@pytest.mark.asyncio(loop_scope="module")
+async def test_failed_stage_routes_to_complete(monkeypatch, sample_invoice, failing_stage, skipped_stage):
+    """Test a stage returning status FAILED skips the remaining stages and finalizes as FAILED"""
+    from src.agents import graph_builder
+    
+    async def failing_node(state, config):
+        return {
+            "errors": [{"stage": failing_stage, "error": "boom"}],
+            "status": _FAILED
+        }
+    
+    monkeypatch.setattr(graph_builder, f"{failing_stage.lower()}_node", failing_node)
+    graph = graph_builder.build_invoice_graph()
+    
+    workflow_id = f"wf_test_route_{next(_wf_counter)}"
+    result = await graph.ainvoke(
+        {
+            "invoice_payload": dict(sample_invoice),
+            "workflow_id": workflow_id,
+            "current_stage": "INTAKE",
+            "created_at": _FROZEN_NOW
+        },
+        {"configurable": {"thread_id": workflow_id}}
+    )
+    
+    stages_run = [log["stage"] for log in result.get("execution_history", [])]
+    assert result.get("current_stage") == "COMPLETE"
+    assert result.get("status") == _FAILED
+    assert result["errors"][0]["stage"] == failing_stage
+    assert skipped_stage not in stages_run